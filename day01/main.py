@@ -1,6 +1,11 @@
+import json
 import os
+from collections import namedtuple
+from collections.abc import Iterable, Iterator
+from itertools import batched, islice
 from pathlib import Path
 
+import numpy as np
 import polars as pl
 import typer
 from elf import (
@@ -23,6 +28,176 @@ LEADERBOARD = os.getenv("BOARD_ID")
 console = Console()
 
 DIAL_SIZE = 100
+DIAL_START = 50
+CHUNK_SIZE = 1_000_000
+
+# Everything we need to carry between chunks: where the dial is, how many rotations
+# ended on zero (part 1), how many clicks went through zero (part 2) and how many
+# rotations have been read so far, to know where to resume
+DialState = namedtuple(
+    "DialState",
+    ["position", "zero_landings", "zero_clicks", "rotations_done"],
+    defaults=[DIAL_START, 0, 0, 0],
+)
+
+# Per-dial results of count_zero_hits, prefixes are only filled when requested
+DialCounts = namedtuple("DialCounts", ["zero_landings", "zero_clicks", "landings_prefix", "clicks_prefix"])
+
+
+def save_dial_state(state: DialState, path: Path) -> None:
+    path.write_text(json.dumps(state._asdict()), encoding="utf-8")
+
+
+def load_dial_state(path: Path) -> DialState:
+    return DialState(**json.loads(path.read_text(encoding="utf-8")))
+
+
+def _iter_rotations(source: Path | Iterable[str]) -> Iterator[str]:
+    if isinstance(source, Path):
+        with source.open(encoding="utf-8") as f:
+            yield from (l_clean for l in f if (l_clean := l.strip()))
+    else:
+        yield from (l_clean for l in source if (l_clean := l.strip()))
+
+
+def process_chunk(chunk: list[str], state: DialState) -> DialState:
+    df = (
+        pl.DataFrame({"line": chunk})
+        .select(
+            pl.col("line").str.slice(0, 1).replace_strict({"R": "1", "L": "-1"}).cast(pl.Int32).alias("direction"),
+            pl.col("line").str.slice(1).cast(pl.Int64).alias("steps"),
+        )
+        .with_columns(
+            (pl.col("steps") * pl.col("direction")).cum_sum().add(state.position).mod(DIAL_SIZE).alias("position")
+        )
+        .with_columns(
+            pl.col("position").shift(fill_value=state.position).alias("prev_position")
+        )
+        .select(
+            pl.col("position").last().alias("position"),
+            (pl.col("position") == 0).sum().alias("zero_landings"),
+            # Going right we hit zero every time we go over a multiple of DIAL_SIZE, going left
+            # it's the same but measuring the distance from the "mirrored" position
+            pl.when(pl.col("direction") == 1)
+            .then((pl.col("prev_position") + pl.col("steps")).floordiv(DIAL_SIZE))
+            .otherwise(((DIAL_SIZE - pl.col("prev_position")).mod(DIAL_SIZE) + pl.col("steps")).floordiv(DIAL_SIZE))
+            .sum()
+            .alias("zero_clicks"),
+        )
+    )
+
+    position, zero_landings, zero_clicks = df.row(0)
+
+    return DialState(
+        position,
+        state.zero_landings + zero_landings,
+        state.zero_clicks + zero_clicks,
+        state.rotations_done + len(chunk),
+    )
+
+
+def stream_rotations(
+    source: Path | Iterable[str],
+    state: DialState = DialState(),
+    chunk_size: int = CHUNK_SIZE,
+    checkpoint: Path | None = None,
+) -> DialState:
+    """Run the dial over the rotations keeping just one chunk in memory at a time.
+
+    With a checkpoint path the state is saved there after every chunk. Resuming from a file
+    skips the rotations the state already went through.
+    """
+    rotations = _iter_rotations(source)
+    if isinstance(source, Path):
+        rotations = islice(rotations, state.rotations_done, None)
+
+    for chunk in batched(rotations, chunk_size):
+        state = process_chunk(list(chunk), state)
+        if checkpoint is not None:
+            save_dial_state(state, checkpoint)
+
+    return state
+
+
+def parse_rotations(input_data: list[str]) -> np.ndarray:
+    return (
+        pl.DataFrame({"line": input_data})
+        .select(
+            (
+                pl.col("line").str.slice(0, 1).replace_strict({"R": "1", "L": "-1"}).cast(pl.Int64)
+                * pl.col("line").str.slice(1).cast(pl.Int64)
+            ).alias("rotation")
+        )
+        .to_series()
+        .to_numpy()
+    )
+
+
+def count_zero_hits(
+    rotations: np.ndarray,
+    starts: np.ndarray | list[int],
+    dial_sizes: np.ndarray | list[int],
+    with_prefix: bool = False,
+    chunk_size: int = CHUNK_SIZE,
+) -> DialCounts:
+    """Run the same signed rotations against a batch of (start, dial_size) dials at once.
+
+    The cumulative sum of every chunk of rotations is computed once and shared by all dials.
+    Chunks shrink as dials are added, so each one holds about `chunk_size` dial positions.
+    """
+    starts, dial_sizes = np.broadcast_arrays(
+        np.atleast_1d(np.asarray(starts, dtype=np.int64)),
+        np.atleast_1d(np.asarray(dial_sizes, dtype=np.int64)),
+    )
+    sizes = dial_sizes[:, None]
+    position = starts % dial_sizes
+
+    zero_landings = np.zeros(len(starts), dtype=np.int64)
+    zero_clicks = np.zeros(len(starts), dtype=np.int64)
+    landings_prefix = []
+    clicks_prefix = []
+
+    rotations_per_chunk = max(1, chunk_size // len(starts))
+    for offset in range(0, len(rotations), rotations_per_chunk):
+        chunk = rotations[offset:offset + rotations_per_chunk]
+        steps = np.abs(chunk)
+
+        positions = (position[:, None] + np.cumsum(chunk)) % sizes
+        prev_positions = np.concatenate([position[:, None], positions[:, :-1]], axis=1)
+
+        landings = (positions == 0).astype(np.int64)
+        # Same rule as the streaming engine: going left is going right from the mirrored position
+        clicks = np.where(
+            chunk > 0,
+            prev_positions + steps,
+            (sizes - prev_positions) % sizes + steps,
+        ) // sizes
+
+        if with_prefix:
+            landings_prefix.append(np.cumsum(landings, axis=1) + zero_landings[:, None])
+            clicks_prefix.append(np.cumsum(clicks, axis=1) + zero_clicks[:, None])
+
+        zero_landings += landings.sum(axis=1)
+        zero_clicks += clicks.sum(axis=1)
+        position = positions[:, -1]
+
+    return DialCounts(
+        zero_landings,
+        zero_clicks,
+        np.concatenate(landings_prefix, axis=1) if landings_prefix else None,
+        np.concatenate(clicks_prefix, axis=1) if clicks_prefix else None,
+    )
+
+
+@timer()
+def part1_streaming(input_data: Path | Iterable[str]) -> str:
+    return str(stream_rotations(input_data).zero_landings)
+
+
+@timer()
+def part2_streaming(input_data: Path | Iterable[str]) -> str:
+    return str(stream_rotations(input_data).zero_clicks)
+
 
 @timer()
 def part1(input_data: list[str]) -> str:
@@ -71,7 +246,8 @@ def part2(input_data: list[str]) -> str:
     df_result = df.select(
         pl.sum_horizontal(
             pl.col("steps_carry_over").sum(),
-            (pl.col("position") == 0).sum(),
+            # A whole number of turns from 0 ends on 0 again, but those are already in the carry over
+            ((pl.col("position") == 0) & (pl.col("steps_normalised") != 0)).sum(),
             pl.col("crossed_but_not_zero").cast(pl.Int32).sum(),
         ).alias("result")
     )
@@ -84,9 +260,9 @@ def part2(input_data: list[str]) -> str:
     return result
 
 
-def main(submit: bool = False):
+def main(submit: bool = False, streaming: bool = False):
 
-    part_functions = [part1, part2]
+    part_functions = [part1_streaming, part2_streaming] if streaming else [part1, part2]
 
     day_input = parse_input(get_puzzle_input(YEAR, DAY))
     # print(day_input)
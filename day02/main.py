@@ -1,8 +1,11 @@
 import os
-from functools import reduce
+from collections.abc import Iterator
+from functools import cache, reduce
+from itertools import chain
 from math import log10
 from pathlib import Path
 
+import numpy as np
 import polars as pl
 import typer
 from elf import (
@@ -28,9 +31,49 @@ console = Console()
 
 DIAL_SIZE = 100
 
+INDEX_DIR = Path("invalid_id_index")
+INDEX_BOUND = 10 ** 12
+
+KERNEL_CHUNK_SIZE = 4_000_000
+# Longest int64 ID and the only repeat counts the kernel has to try: repeating a pattern k times
+# also repeats it p times for every prime p dividing k, so primes are enough
+MAX_ID_DIGITS = 19
+PRIME_REPEATS = (2, 3, 5, 7, 11, 13, 17, 19)
+POWERS_OF_TEN = np.array([10 ** i for i in range(1, MAX_ID_DIGITS)], dtype=np.int64)
+
 def parse_input(input_data: str) -> list[str]:
     return [r.strip() for r in input_data.split(",")]
 
+def parse_ranges(input_data: list[str]) -> list[tuple[int, int]]:
+    return [
+        (int(lower_bound), int(upper_bound))
+        for r in input_data
+        if r
+        for lower_bound, _, upper_bound in [r.partition("-")]
+    ]
+
+def repeated_ids(lower: int, upper: int, min_repeats: int = 2, max_repeats: int | None = None) -> Iterator[int]:
+    """Yield, in ascending order, the IDs in [lower, upper] made of a digit pattern repeated
+    between min_repeats and max_repeats times.
+
+    A pattern of d digits repeated k times is pattern * (10^(d*k) - 1) / (10^d - 1), so for each
+    length we only walk the patterns whose repetition falls inside the range.
+    """
+    for length in range(max(2, len(str(lower))), len(str(upper)) + 1):
+        # The same ID can come from several splits ("1111" is 2 x "11" and 4 x "1")
+        length_ids = set()
+        for repeats in range(min_repeats, min(max_repeats or length, length) + 1):
+            if length % repeats:
+                continue
+            pattern_len = length // repeats
+            multiplier = (10 ** length - 1) // (10 ** pattern_len - 1)
+            first_pattern = max(10 ** (pattern_len - 1), -(-lower // multiplier))
+            last_pattern = min(10 ** pattern_len - 1, upper // multiplier)
+            length_ids.update(
+                pattern * multiplier for pattern in range(first_pattern, last_pattern + 1)
+            )
+        yield from sorted(length_ids)
+
 @timer()
 def part1(input_data: list[str]) -> str:
     df = pl.DataFrame(
@@ -101,9 +144,200 @@ def part2(input_data: list[str]) -> str:
     return result
 
 
-def main(submit: bool = False):
+def merge_ranges(ranges: list[tuple[int, int]]) -> list[tuple[int, int]]:
+    merged_ranges = []
+    for lower_bound, upper_bound in sorted(ranges):
+        if not merged_ranges or merged_ranges[-1][1] < lower_bound - 1:
+            merged_ranges.append((lower_bound, upper_bound))
+        else:
+            merged_ranges[-1] = (merged_ranges[-1][0], max(merged_ranges[-1][1], upper_bound))
+
+    return merged_ranges
+
+
+def _prefix_sums(ids: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    # Sums of 64-bit IDs overflow 64 bits quickly, so keep them as 128-bit numbers split in two
+    # words: the low word wraps around naturally and every wrap is a carry into the high word
+    low = np.concatenate([np.zeros(1, dtype=np.uint64), np.cumsum(ids, dtype=np.uint64)])
+    high = np.concatenate([np.zeros(1, dtype=np.uint64), np.cumsum(low[1:] < low[:-1], dtype=np.uint64)])
+
+    return low, high
+
+
+def _repunit_table(repeats: int) -> np.ndarray:
+    # For every digit length, (10^L - 1) / (10^d - 1) with d = L / repeats, or 0 if it does not split
+    return np.array([
+        (10 ** length - 1) // (10 ** (length // repeats) - 1) if length % repeats == 0 and length > 1 else 0
+        for length in range(MAX_ID_DIGITS + 1)
+    ], dtype=np.int64)
+
+REPUNIT_TABLES = {repeats: _repunit_table(repeats) for repeats in PRIME_REPEATS}
+
+
+def invalid_id_mask(ids: np.ndarray, twice_only: bool = False) -> np.ndarray:
+    """Flag the IDs made of a digit pattern repeated (twice if twice_only) with integer maths only.
+
+    An L digit ID is a d digit pattern repeated L / d times exactly when it is a multiple of
+    (10^L - 1) / (10^d - 1).
+    """
+    ids = np.asarray(ids, dtype=np.int64)
+    lengths = np.searchsorted(POWERS_OF_TEN, ids, side="right") + 1
+
+    present_lengths = np.flatnonzero(np.bincount(lengths.ravel(), minlength=MAX_ID_DIGITS + 1))
+
+    mask = np.zeros(ids.shape, dtype=bool)
+    for repeats in PRIME_REPEATS[:1] if twice_only else PRIME_REPEATS:
+        if not REPUNIT_TABLES[repeats][present_lengths].any():
+            continue
+        factors = REPUNIT_TABLES[repeats][lengths]
+        splits = factors > 0
+        mask |= splits & (ids % np.where(splits, factors, 1) == 0)
+
+    return mask
+
+
+def sum_invalid_ids(lower: int, upper: int, twice_only: bool = False, chunk_size: int = KERNEL_CHUNK_SIZE) -> int:
+    result = 0
+    for chunk_start in range(lower, upper + 1, chunk_size):
+        ids = np.arange(chunk_start, min(chunk_start + chunk_size, upper + 1), dtype=np.int64)
+        result += int(ids[invalid_id_mask(ids, twice_only)].sum())
+
+    return result
+
+
+class InvalidIdIndex:
+    """Sorted invalid IDs up to a bound plus their prefix sums, so any range sum is two lookups."""
+
+    KINDS = ("twice", "repeated")
+
+    def __init__(self, bound: int, arrays: dict[str, np.ndarray]):
+        self.bound = bound
+        self.arrays = arrays
+
+    @classmethod
+    def build(cls, bound: int = INDEX_BOUND) -> "InvalidIdIndex":
+        if bound >= 2 ** 63:
+            raise ValueError(f"Bound {bound} does not fit in a 64-bit ID")
+
+        arrays = {}
+        for kind, max_repeats in zip(cls.KINDS, (2, None)):
+            ids = np.fromiter(repeated_ids(1, bound, max_repeats=max_repeats), dtype=np.int64)
+            arrays[f"{kind}_ids"] = ids
+            arrays[f"{kind}_sum_low"], arrays[f"{kind}_sum_high"] = _prefix_sums(ids)
+
+        return cls(bound, arrays)
+
+    def save(self, path: Path) -> None:
+        path.mkdir(parents=True, exist_ok=True)
+        (path / "bound").write_text(str(self.bound), encoding="utf-8")
+        for name, array in self.arrays.items():
+            np.save(path / f"{name}.npy", array)
+
+    @classmethod
+    def load(cls, path: Path) -> "InvalidIdIndex":
+        bound = int((path / "bound").read_text(encoding="utf-8"))
+        arrays = {
+            f"{kind}_{name}": np.load(path / f"{kind}_{name}.npy", mmap_mode="r")
+            for kind in cls.KINDS
+            for name in ("ids", "sum_low", "sum_high")
+        }
+
+        return cls(bound, arrays)
+
+    def range_sum(self, lower: int, upper: int, kind: str) -> int:
+        if upper > self.bound:
+            raise ValueError(f"Range {lower}-{upper} goes over the index bound {self.bound}")
+
+        ids = self.arrays[f"{kind}_ids"]
+        start = int(np.searchsorted(ids, lower, side="left"))
+        end = int(np.searchsorted(ids, upper, side="right"))
+
+        low = self.arrays[f"{kind}_sum_low"]
+        high = self.arrays[f"{kind}_sum_high"]
+
+        return ((int(high[end]) - int(high[start])) << 64) + int(low[end]) - int(low[start])
+
+
+@cache
+def get_index() -> InvalidIdIndex:
+    if INDEX_DIR.is_dir():
+        return InvalidIdIndex.load(INDEX_DIR)
+
+    index = InvalidIdIndex.build(INDEX_BOUND)
+    index.save(INDEX_DIR)
+
+    return index
+
+
+@timer()
+def part1_index(input_data: list[str]) -> str:
+    index = get_index()
+    result = sum(
+        index.range_sum(lower_bound, upper_bound, "twice")
+        for lower_bound, upper_bound in parse_ranges(input_data)
+    )
+
+    return str(result)
+
+@timer()
+def part2_index(input_data: list[str]) -> str:
+    index = get_index()
+    # Overlapping ranges are merged first so shared IDs only count once
+    result = sum(
+        index.range_sum(lower_bound, upper_bound, "repeated")
+        for lower_bound, upper_bound in merge_ranges(parse_ranges(input_data))
+    )
+
+    return str(result)
+
+@timer()
+def part1_kernel(input_data: list[str]) -> str:
+    result = sum(
+        sum_invalid_ids(lower_bound, upper_bound, twice_only=True)
+        for lower_bound, upper_bound in parse_ranges(input_data)
+    )
+
+    return str(result)
+
+@timer()
+def part2_kernel(input_data: list[str]) -> str:
+    result = sum(
+        sum_invalid_ids(lower_bound, upper_bound)
+        for lower_bound, upper_bound in merge_ranges(parse_ranges(input_data))
+    )
+
+    return str(result)
+
+@timer()
+def part1_generator(input_data: list[str]) -> str:
+    result = sum(
+        sum(repeated_ids(lower_bound, upper_bound, max_repeats=2))
+        for lower_bound, upper_bound in parse_ranges(input_data)
+    )
+
+    return str(result)
+
+@timer()
+def part2_generator(input_data: list[str]) -> str:
+    # Same as part2, an ID in several overlapping ranges only counts once
+    bad_ids = set(chain.from_iterable(
+        repeated_ids(lower_bound, upper_bound)
+        for lower_bound, upper_bound in parse_ranges(input_data)
+    ))
+
+    return str(sum(bad_ids))
+
+
+ENGINES = {
+    "polars": [part1, part2],
+    "generator": [part1_generator, part2_generator],
+    "index": [part1_index, part2_index],
+    "kernel": [part1_kernel, part2_kernel],
+}
+
+def main(submit: bool = False, engine: str = "polars"):
 
-    part_functions = [part1, part2]
+    part_functions = ENGINES[engine]
 
     day_input = parse_input(get_puzzle_input(YEAR, DAY))
     print(day_input)
@@ -1,6 +1,7 @@
 import os
 from pathlib import Path
 
+import numpy as np
 import polars as pl
 import typer
 from elf import (
@@ -26,129 +27,152 @@ console = Console()
 
 DIAL_SIZE = 100
 
+# Biggest joltage that still fits in an int64
+MAX_BATCH_JOLTAGE_LEN = 18
+
+def max_joltage(bank: str, k: int) -> int:
+    """Largest k digit number keeping the order of the bank digits, in a single pass.
+
+    Greedy monotonic stack: a digit pops every smaller digit before it as long as we can still
+    afford to drop digits (len(bank) - k in total).
+    """
+    to_drop = len(bank) - k
+    if to_drop < 0:
+        raise ValueError(f"Bank {bank} has fewer than {k} batteries")
+
+    stack: list[str] = []
+    for digit in bank:
+        while to_drop and stack and stack[-1] < digit:
+            stack.pop()
+            to_drop -= 1
+        stack.append(digit)
+
+    return int("".join(stack[:k]))
+
+
+def parse_banks(input_data: str | bytes) -> np.ndarray:
+    """View equal length banks as a (banks, batteries) uint8 matrix of digits."""
+    raw = input_data.encode() if isinstance(input_data, str) else input_data
+    raw = raw.strip() + b"\n"
+    width = raw.index(b"\n") + 1
+
+    if len(raw) % width:
+        raise ValueError("All banks must have the same number of batteries")
+    matrix = np.frombuffer(raw, dtype=np.uint8).reshape(-1, width)
+    if (matrix[:, -1] != ord("\n")).any():
+        raise ValueError("All banks must have the same number of batteries")
+
+    return matrix[:, :-1] - ord("0")
+
+
+def max_joltage_batch(banks: np.ndarray, k: int) -> np.ndarray:
+    """Best k digit joltage of every bank at once, walking the digit matrix column by column.
+
+    best[j] is the best j digit joltage using the columns seen so far: a new column either
+    leaves it as it is or appends its digit to best[j - 1].
+    """
+    if k > MAX_BATCH_JOLTAGE_LEN:
+        raise ValueError(f"Joltages of {k} digits do not fit in an int64")
+    if k > banks.shape[1]:
+        raise ValueError(f"Banks have fewer than {k} batteries")
+
+    best = np.full((k + 1, banks.shape[0]), -1, dtype=np.int64)
+    best[0] = 0
+
+    for column in range(banks.shape[1]):
+        digits = banks[:, column]
+        # Going down so best[j - 1] still holds the previous column's value
+        for j in range(min(k, column + 1), 0, -1):
+            np.maximum(best[j], best[j - 1] * 10 + digits, out=best[j])
+
+    return best[k]
+
+
+def joltage_keep_ranks(banks: np.ndarray) -> np.ndarray:
+    """Compact form of the whole joltage-vs-k curve of every bank.
+
+    Best selections are nested: the best k - 1 batteries are the best k ones minus one of them.
+    So each battery gets a rank and the best k batteries of a bank are the ones with rank < k.
+    Ranks come from the monotonic stack with an unlimited budget: popped batteries are the
+    first ones to go, and once the scan is done what is left goes from the back.
+    """
+    n_batteries = banks.shape[1]
+    ranks = np.empty(banks.shape, dtype=np.uint16 if n_batteries <= 2 ** 16 else np.uint32)
+
+    for bank_idx, bank in enumerate(banks.tolist()):
+        bank_ranks = [0] * n_batteries
+        next_rank = n_batteries - 1
+        stack: list[int] = []
+        for idx, digit in enumerate(bank):
+            while stack and bank[stack[-1]] < digit:
+                bank_ranks[stack.pop()] = next_rank
+                next_rank -= 1
+            stack.append(idx)
+        for idx in reversed(stack):
+            bank_ranks[idx] = next_rank
+            next_rank -= 1
+        ranks[bank_idx] = bank_ranks
+
+    return ranks
+
+
+def joltage_from_ranks(bank: np.ndarray, ranks: np.ndarray, k: int) -> int:
+    return int((bank[ranks < k] + ord("0")).tobytes())
+
+
+def total_joltage_curve(banks: np.ndarray, ranks: np.ndarray) -> list[int]:
+    """Sum over every bank of the best joltage for k = 1..batteries (item k - 1)."""
+    curve = []
+    for k in range(1, banks.shape[1] + 1):
+        kept = ranks < k
+        # Place of every kept digit counting from the right, to add them up by place value
+        places = np.cumsum(kept[:, ::-1], axis=1)[:, ::-1] - 1
+        place_sums = np.bincount(places[kept], weights=banks[kept], minlength=k)
+        curve.append(sum(int(place_sum) * 10 ** place for place, place_sum in enumerate(place_sums)))
+
+    return curve
+
+
+@timer()
+def part1_batch(input_data: np.ndarray) -> str:
+    joltages = max_joltage_batch(input_data, 2)
+
+    return str(int(joltages.sum()))
+
+@timer()
+def part2_batch(input_data: np.ndarray) -> str:
+    joltages = max_joltage_batch(input_data, 12)
+
+    # Millions of 12 digit joltages overflow an int64 sum
+    return str(sum(int(j) for j in joltages))
+
+
 @timer()
 def part1(input_data: list[str]) -> str:
-    df = pl.DataFrame(
-        {"line": input_data}
-    ).with_row_index().lazy().with_columns(
-        pl.col("line").str.split("").cast(pl.List(pl.Int32)).alias("digits")
-    ).with_columns(
-        pl.col("digits").list.slice(0, pl.col("digits").list.len() - 1).list.explode().cum_max().implode().over("index").alias("first_digits"),
-    ).with_columns(
-        pl.col("digits").list.slice(pl.col("first_digits").list.arg_max() + 1).list.explode().cum_max().implode().over("index").alias("second_digits")
-    ).with_columns(
-        pl.concat_str(
-            pl.col("first_digits").list.max(),
-            pl.col("second_digits").list.max(),
-        ).cast(pl.Int32).alias("joltage")
-    ).sort("index").collect()
-
-    console.print(df)
-    result = df.select(pl.sum("joltage").cast(pl.String)).item()
-
-    return result
+    result = sum(max_joltage(bank, 2) for bank in input_data if bank)
+
+    return str(result)
 
 @timer()
 def part2(input_data: list[str]) -> str:
+    result = sum(max_joltage(bank, 12) for bank in input_data if bank)
+
+    return str(result)
+
+
+def main(submit: bool = False, batch: bool = False):
+
+    if batch:
+        part_functions = [part1_batch, part2_batch]
+        parse_function = parse_banks
+    else:
+        part_functions = [part1, part2]
+        parse_function = parse_input
 
-    joltage_len = 12
-
-    df = pl.DataFrame(
-        {"line": input_data}
-    ).with_row_index().lazy().with_columns(
-        pl.col("line").str.split("").cast(pl.List(pl.Int32)).alias("digits")
-    ).with_columns(
-        pl.col("digits").list.slice(
-            0, 
-            pl.col("digits").list.len() - (joltage_len - 1)
-        ).list.explode().cum_max().implode().over("index").alias("first_digits"),
-    ).with_columns(
-        (pl.col("digits").list.len() - (joltage_len - 2)).alias("second_length"),
-        (pl.min_horizontal(pl.col("digits").list.len() - (joltage_len - 2), pl.col("digits").list.len() - joltage_len - 1 -  pl.col("first_digits").list.arg_max() + 2)).alias("second_length_corrected"),
-        pl.col("digits").list.slice(
-            pl.col("first_digits").list.arg_max() + 1, 
-            (pl.min_horizontal(pl.col("digits").list.len() - (joltage_len - 2), pl.col("digits").list.len() - joltage_len - 1 -  (pl.col("first_digits").list.arg_max()) + 2)),
-        ).list.explode().cum_max().implode().over("index").alias("second_digits")
-    ).with_columns(
-        pl.col("digits").list.slice(
-            pl.col("first_digits").list.arg_max() + pl.col("second_digits").list.arg_max() + 2, 
-            (pl.min_horizontal(pl.col("digits").list.len() - (joltage_len - 3), pl.col("digits").list.len() - joltage_len - 1 -  (pl.col("first_digits").list.arg_max() + pl.col("second_digits").list.arg_max()) + 2))
-        ).list.explode().cum_max().implode().over("index").alias("third_digits")
-    ).with_columns(
-        pl.col("digits").list.slice(
-            pl.col("first_digits").list.arg_max() + pl.col("second_digits").list.arg_max() + pl.col("third_digits").list.arg_max() + 3,
-            (pl.min_horizontal(pl.col("digits").list.len() - (joltage_len - 4), pl.col("digits").list.len() - joltage_len - 1 -  (pl.col("first_digits").list.arg_max() + pl.col("second_digits").list.arg_max() + pl.col("third_digits").list.arg_max()) + 2))
-        ).list.explode().cum_max().implode().over("index").alias("fourth_digits")
-    ).with_columns(
-        pl.col("digits").list.slice(
-            pl.col("first_digits").list.arg_max() + pl.col("second_digits").list.arg_max() + pl.col("third_digits").list.arg_max() + pl.col("fourth_digits").list.arg_max() + 4,
-            (pl.min_horizontal(pl.col("digits").list.len() - (joltage_len - 5), pl.col("digits").list.len() - joltage_len - 1 -  (pl.col("first_digits").list.arg_max() + pl.col("second_digits").list.arg_max() + pl.col("third_digits").list.arg_max() + pl.col("fourth_digits").list.arg_max()) + 2))
-        ).list.explode().cum_max().implode().over("index").alias("fifth_digits")
-    ).with_columns(
-        pl.col("digits").list.slice(
-            pl.col("first_digits").list.arg_max() + pl.col("second_digits").list.arg_max() + pl.col("third_digits").list.arg_max() + pl.col("fourth_digits").list.arg_max() + pl.col("fifth_digits").list.arg_max() + 5,
-            (pl.min_horizontal(pl.col("digits").list.len() - (joltage_len - 6), pl.col("digits").list.len() - joltage_len - 1 -  (pl.col("first_digits").list.arg_max() + pl.col("second_digits").list.arg_max() + pl.col("third_digits").list.arg_max() + pl.col("fourth_digits").list.arg_max() + pl.col("fifth_digits").list.arg_max()) + 2))
-        ).list.explode().cum_max().implode().over("index").alias("sixth_digits")
-    ).with_columns(
-        pl.col("digits").list.slice(
-            pl.col("first_digits").list.arg_max() + pl.col("second_digits").list.arg_max() + pl.col("third_digits").list.arg_max() + pl.col("fourth_digits").list.arg_max() + pl.col("fifth_digits").list.arg_max() + pl.col("sixth_digits").list.arg_max() + 6,
-            (pl.min_horizontal(pl.col("digits").list.len() - (joltage_len - 7), pl.col("digits").list.len() - joltage_len - 1 -  (pl.col("first_digits").list.arg_max() + pl.col("second_digits").list.arg_max() + pl.col("third_digits").list.arg_max() + pl.col("fourth_digits").list.arg_max() + pl.col("fifth_digits").list.arg_max() + pl.col("sixth_digits").list.arg_max()) + 2))
-        ).list.explode().cum_max().implode().over("index").alias("seventh_digits")
-    ).with_columns(
-        pl.col("digits").list.slice(
-            pl.col("first_digits").list.arg_max() + pl.col("second_digits").list.arg_max() + pl.col("third_digits").list.arg_max() + pl.col("fourth_digits").list.arg_max() + pl.col("fifth_digits").list.arg_max() + pl.col("sixth_digits").list.arg_max() + pl.col("seventh_digits").list.arg_max() + 7,
-            (pl.min_horizontal(pl.col("digits").list.len() - (joltage_len - 8), pl.col("digits").list.len() - joltage_len - 1 -  (pl.col("first_digits").list.arg_max() + pl.col("second_digits").list.arg_max() + pl.col("third_digits").list.arg_max() + pl.col("fourth_digits").list.arg_max() + pl.col("fifth_digits").list.arg_max() + pl.col("sixth_digits").list.arg_max() + pl.col("seventh_digits").list.arg_max()) + 2))
-        ).list.explode().cum_max().implode().over("index").alias("eigth_digits")
-    ).with_columns(
-        pl.col("digits").list.slice(
-            pl.col("first_digits").list.arg_max() + pl.col("second_digits").list.arg_max() + pl.col("third_digits").list.arg_max() + pl.col("fourth_digits").list.arg_max() + pl.col("fifth_digits").list.arg_max() + pl.col("sixth_digits").list.arg_max() + pl.col("seventh_digits").list.arg_max() + pl.col("eigth_digits").list.arg_max() + 8,
-            (pl.min_horizontal(pl.col("digits").list.len() - (joltage_len - 9), pl.col("digits").list.len() - joltage_len - 1 -  (pl.col("first_digits").list.arg_max() + pl.col("second_digits").list.arg_max() + pl.col("third_digits").list.arg_max() + pl.col("fourth_digits").list.arg_max() + pl.col("fifth_digits").list.arg_max() + pl.col("sixth_digits").list.arg_max() + pl.col("seventh_digits").list.arg_max() + pl.col("eigth_digits").list.arg_max()) + 2))
-        ).list.explode().cum_max().implode().over("index").alias("nineth_digits")
-    ).with_columns(
-        pl.col("digits").list.slice(
-            pl.col("first_digits").list.arg_max() + pl.col("second_digits").list.arg_max() + pl.col("third_digits").list.arg_max() + pl.col("fourth_digits").list.arg_max() + pl.col("fifth_digits").list.arg_max() + pl.col("sixth_digits").list.arg_max() + pl.col("seventh_digits").list.arg_max() + pl.col("eigth_digits").list.arg_max() + pl.col("nineth_digits").list.arg_max() + 9,
-            (pl.min_horizontal(pl.col("digits").list.len() - (joltage_len - 10), pl.col("digits").list.len() - joltage_len - 1 -  (pl.col("first_digits").list.arg_max() + pl.col("second_digits").list.arg_max() + pl.col("third_digits").list.arg_max() + pl.col("fourth_digits").list.arg_max() + pl.col("fifth_digits").list.arg_max() + pl.col("sixth_digits").list.arg_max() + pl.col("seventh_digits").list.arg_max() + pl.col("eigth_digits").list.arg_max() + pl.col("nineth_digits").list.arg_max()) + 2))
-        ).list.explode().cum_max().implode().over("index").alias("tenth_digits")
-    ).with_columns(
-        pl.col("digits").list.slice(
-            pl.col("first_digits").list.arg_max() + pl.col("second_digits").list.arg_max() + pl.col("third_digits").list.arg_max() + pl.col("fourth_digits").list.arg_max() + pl.col("fifth_digits").list.arg_max() + pl.col("sixth_digits").list.arg_max() + pl.col("seventh_digits").list.arg_max() + pl.col("eigth_digits").list.arg_max() + pl.col("nineth_digits").list.arg_max() + pl.col("tenth_digits").list.arg_max() + 10,
-            (pl.min_horizontal(pl.col("digits").list.len() - (joltage_len - 11), pl.col("digits").list.len() - joltage_len - 1 -  (pl.col("first_digits").list.arg_max() + pl.col("second_digits").list.arg_max() + pl.col("third_digits").list.arg_max() + pl.col("fourth_digits").list.arg_max() + pl.col("fifth_digits").list.arg_max() + pl.col("sixth_digits").list.arg_max() + pl.col("seventh_digits").list.arg_max()+  pl.col("eigth_digits").list.arg_max() + pl.col("nineth_digits").list.arg_max() + pl.col("tenth_digits").list.arg_max()) + 2))
-        ).list.explode().cum_max().implode().over("index").alias("eleventh_digits")
-    ).with_columns(
-        pl.col("digits").list.slice(
-            pl.col("first_digits").list.arg_max() + pl.col("second_digits").list.arg_max() + pl.col("third_digits").list.arg_max() + pl.col("fourth_digits").list.arg_max() + pl.col("fifth_digits").list.arg_max() + pl.col("sixth_digits").list.arg_max() + pl.col("seventh_digits").list.arg_max() + pl.col("eigth_digits").list.arg_max() + pl.col("nineth_digits").list.arg_max() + pl.col("tenth_digits").list.arg_max() + pl.col("eleventh_digits").list.arg_max() + 11
-        ).list.explode().cum_max().implode().over("index").alias("twelveth_digits")
-    ).with_columns(
-        pl.concat_str(
-            pl.col("first_digits").list.max(),
-            pl.col("second_digits").list.max(),
-            pl.col("third_digits").list.max(),
-            pl.col("fourth_digits").list.max(),
-            pl.col("fifth_digits").list.max(),
-            pl.col("sixth_digits").list.max(),
-            pl.col("seventh_digits").list.max(),
-            pl.col("eigth_digits").list.max(),
-            pl.col("nineth_digits").list.max(),
-            pl.col("tenth_digits").list.max(),
-            pl.col("eleventh_digits").list.max(),
-            pl.col("twelveth_digits").list.max(),
-        ).cast(pl.Int64).alias("joltage")
-    ).sort("index").collect()
-
-    console.print(df)
-    result = df.select(pl.sum("joltage").cast(pl.String)).item()
-
-    return result
-
-
-def main(submit: bool = False):
-
-    part_functions = [part1, part2]
-
-    day_input = parse_input(get_puzzle_input(YEAR, DAY))
+    day_input = parse_function(get_puzzle_input(YEAR, DAY))
     # print(day_input)
 
-    test_input = parse_input(read_input(Path("test_input.txt")))
+    test_input = parse_function(read_input(Path("test_input.txt")))
     # print(test_input)
 
     for idx, part in enumerate(part_functions):
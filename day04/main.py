@@ -1,5 +1,5 @@
 import os
-from collections import defaultdict, namedtuple
+from collections import Counter, defaultdict, namedtuple
 from enum import Enum
 from pathlib import Path
 
@@ -83,6 +83,39 @@ class Grid:
                 
         return len(rolls_to_remove)
 
+    def peel_rolls(self) -> dict[Position, int]:
+        """Remove rolls until none can be removed, returning the round each roll went in.
+
+        Adjacent rolls are counted once, then every removal only updates its neighbours' counts
+        and queues the ones dropping below 4 for the next round, so each roll is visited once.
+        """
+        adjacent_rolls = {
+            position: sum(self.grid[p.row][p.column] == GridElement.ROLL for p in adjacent)
+            for position, adjacent in self.adjacency_matrix.items()
+        }
+
+        current_round = 1
+        current_rolls = [position for position, count in adjacent_rolls.items() if count < 4]
+        removal_rounds = {position: current_round for position in current_rolls}
+
+        while current_rolls:
+            next_rolls = []
+            for position in current_rolls:
+                for adjacent_position in self.adjacency_matrix.pop(position):
+                    # Only rolls not already queued for removal care about losing a neighbour
+                    if adjacent_position not in adjacent_rolls or adjacent_position in removal_rounds:
+                        continue
+                    adjacent_rolls[adjacent_position] -= 1
+                    if adjacent_rolls[adjacent_position] < 4:
+                        removal_rounds[adjacent_position] = current_round + 1
+                        next_rolls.append(adjacent_position)
+                self.grid[position.row][position.column] = GridElement.NOTHING
+
+            current_round += 1
+            current_rolls = next_rolls
+
+        return removal_rounds
+
 
 @timer()
 def part1(input_data: list[str]) -> str:
@@ -97,15 +130,13 @@ def part1(input_data: list[str]) -> str:
 def part2(input_data: list[str]) -> str:
     grid = Grid(input_data)
 
-    iterations = 0
+    removal_rounds = grid.peel_rolls()
+
     removed_rolls = 0
-    current_removed_rolls = None
-    while current_removed_rolls is None or current_removed_rolls > 0:
-        iterations += 1
-        current_removed_rolls = grid.remove_rolls()
+    for iteration, current_removed_rolls in sorted(Counter(removal_rounds.values()).items()):
         removed_rolls = removed_rolls + current_removed_rolls
-        console.print(f"Iteration {iterations} - removed {current_removed_rolls} rolls - total {removed_rolls}")
-    
+        console.print(f"Iteration {iteration} - removed {current_removed_rolls} rolls - total {removed_rolls}")
+
     return str(removed_rolls)
 
 
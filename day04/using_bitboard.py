@@ -0,0 +1,145 @@
+import os
+from pathlib import Path
+
+import numpy as np
+import typer
+from elf import (
+    get_puzzle_input,
+    submit_puzzle_answer,
+    get_private_leaderboard,
+    get_user_status,
+    OutputFormat,
+)
+from elf.helpers import parse_input, read_input, timer
+from rich.console import Console
+
+YEAR = 2025
+DAY = int(Path(__file__).parent.name.split("day")[-1])
+LEADERBOARD = os.getenv("BOARD_ID")
+
+console = Console()
+
+# Rows handled at once, bounds the temporary boards of a sweep
+BAND_ROWS = 4096
+
+
+def parse_board(input_data: list[str]) -> np.ndarray:
+    """Pack the grid into a (rows, words) uint64 bitboard, column c is bit c % 64 of word c // 64."""
+    lines = [line for line in input_data if line]
+    width = len(lines[0])
+    words = (width + 63) // 64
+
+    board = np.zeros((len(lines), words), dtype=np.uint64)
+    for start in range(0, len(lines), BAND_ROWS):
+        band = np.frombuffer(
+            "".join(lines[start:start + BAND_ROWS]).encode(), dtype=np.uint8
+        ).reshape(-1, width) == ord("@")
+        packed = np.zeros((band.shape[0], words * 8), dtype=np.uint8)
+        packed[:, :(width + 7) // 8] = np.packbits(band, axis=1, bitorder="little")
+        board[start:start + band.shape[0]] = packed.view("<u8")
+
+    return board
+
+
+def _west(rows: np.ndarray) -> np.ndarray:
+    # Every cell gets the bit of the cell on its left
+    shifted = rows << 1
+    shifted[:, 1:] |= rows[:, :-1] >> 63
+    return shifted
+
+
+def _east(rows: np.ndarray) -> np.ndarray:
+    # Every cell gets the bit of the cell on its right
+    shifted = rows >> 1
+    shifted[:, :-1] |= rows[:, 1:] << 63
+    return shifted
+
+
+def get_rolls_to_remove(board: np.ndarray, start: int, end: int) -> np.ndarray:
+    """Rolls of rows [start, end) with fewer than 4 adjacent rolls, as a bitboard."""
+    window = np.zeros((end - start + 2, board.shape[1]), dtype=np.uint64)
+    window_start = max(start - 1, 0)
+    window_end = min(end + 1, board.shape[0])
+    window[window_start - start + 1:window_end - start + 1] = board[window_start:window_end]
+
+    above, center, below = window[:-2], window[1:-1], window[2:]
+    neighbours = [
+        above, _west(above), _east(above),
+        _west(center), _east(center),
+        below, _west(below), _east(below),
+    ]
+
+    # Bit sliced counter of adjacent rolls, saturating once it reaches 4
+    ones = np.zeros_like(center)
+    twos = np.zeros_like(center)
+    at_least_four = np.zeros_like(center)
+    for neighbour in neighbours:
+        carry = ones & neighbour
+        ones ^= neighbour
+        at_least_four |= twos & carry
+        twos ^= carry
+
+    return center & ~at_least_four
+
+
+@timer()
+def part1(input_data: list[str]) -> str:
+    board = parse_board(input_data)
+
+    result = sum(
+        int(np.bitwise_count(get_rolls_to_remove(board, start, min(start + BAND_ROWS, board.shape[0]))).sum())
+        for start in range(0, board.shape[0], BAND_ROWS)
+    )
+
+    return str(result)
+
+@timer()
+def part2(input_data: list[str]) -> str:
+    board = parse_board(input_data)
+
+    # Rolls are removed band by band as soon as they can go. The order does not change which
+    # rolls are left at the end, only how many sweeps it takes to get there.
+    total_removed = 0
+    current_removed = None
+    while current_removed is None or current_removed > 0:
+        current_removed = 0
+        for start in range(0, board.shape[0], BAND_ROWS):
+            end = min(start + BAND_ROWS, board.shape[0])
+            rolls_to_remove = get_rolls_to_remove(board, start, end)
+            board[start:end] &= ~rolls_to_remove
+            current_removed += int(np.bitwise_count(rolls_to_remove).sum())
+        total_removed += current_removed
+        console.print(f"Current removed: {current_removed} - Total removed so far: {total_removed}")
+
+    result = total_removed
+
+    return str(result)
+
+def main(submit: bool = False):
+
+    part_functions = [part1, part2]
+
+    day_input = parse_input(get_puzzle_input(YEAR, DAY))
+    # print(day_input)
+
+    test_input = parse_input(read_input(Path("test_input.txt")))
+    # print(test_input)
+
+    for idx, part in enumerate(part_functions):
+        console.print()
+        console.print(f"Checking part {idx+1}")
+        test_result = part(test_input)
+        console.print(f"Part {idx+1} Test Result: {test_result}")
+
+        result = part(day_input)
+        console.print(f"Part {idx+1} Result: {result}")
+
+        if submit:
+            if result == "0":
+                console.print(f"Part {idx+1} has not been tried to resolve, skipping...")
+                continue
+            submission_result = submit_puzzle_answer(YEAR, DAY, idx+1, result)
+            console.print(submission_result.is_correct, submission_result.message)
+
+if __name__ == "__main__":
+    typer.run(main)
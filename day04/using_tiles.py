@@ -0,0 +1,178 @@
+import os
+import shutil
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from tempfile import TemporaryDirectory
+
+import numpy as np
+import typer
+from elf import (
+    get_puzzle_input,
+    submit_puzzle_answer,
+    get_private_leaderboard,
+    get_user_status,
+    OutputFormat,
+)
+from elf.helpers import timer
+from rich.console import Console
+
+from using_convolution import get_rolls_to_remove
+
+YEAR = 2025
+DAY = int(Path(__file__).parent.name.split("day")[-1])
+LEADERBOARD = os.getenv("BOARD_ID")
+
+console = Console()
+
+# Rows per tile, peak memory of every worker is a few copies of a tile
+BAND_ROWS = 1024
+
+ROLL = ord("@")
+NOTHING = ord(".")
+
+
+def prepare_state(input_path: Path, state_path: Path) -> tuple[int, int]:
+    """Copy the input as the grid state file, making sure every row ends in a newline."""
+    shutil.copyfile(input_path, state_path)
+    with state_path.open("rb+") as f:
+        f.seek(-1, os.SEEK_END)
+        if f.read(1) != b"\n":
+            f.write(b"\n")
+
+    with state_path.open("rb") as f:
+        width = len(f.readline())
+
+    rows, remainder = divmod(state_path.stat().st_size, width)
+    if remainder:
+        raise ValueError(f"Rows in {input_path} do not all have the same length")
+
+    return rows, width
+
+
+def _bands(rows: int) -> list[tuple[int, int]]:
+    return [(start, min(start + BAND_ROWS, rows)) for start in range(0, rows, BAND_ROWS)]
+
+
+def _read_rows(state_path: Path, shape: tuple[int, int], rows: list[int]) -> list[np.ndarray]:
+    state = np.memmap(state_path, dtype=np.uint8, mode="r", shape=shape)
+    return [(state[row, :-1] == ROLL).astype(int) for row in rows]
+
+
+def process_band(
+    state_path: Path,
+    shape: tuple[int, int],
+    start: int,
+    end: int,
+    above: np.ndarray,
+    below: np.ndarray,
+    remove: bool,
+) -> tuple[int, np.ndarray, np.ndarray]:
+    """Remove (or just count) the accessible rolls of rows [start, end) given its halo rows.
+
+    Returns how many rolls went and the new first and last rows, the halos of the next round.
+    """
+    state = np.memmap(state_path, dtype=np.uint8, mode="r+" if remove else "r", shape=shape)
+    band = state[start:end, :-1]
+    grid = (band == ROLL).astype(int)
+
+    rolls_to_remove = get_rolls_to_remove(np.vstack([above, grid, below]))[1:-1]
+
+    if remove:
+        band[rolls_to_remove] = NOTHING
+        state.flush()
+        grid[rolls_to_remove] = 0
+
+    return int(rolls_to_remove.sum()), grid[0], grid[-1]
+
+
+def remove_rolls_tiled(input_path: Path, remove: bool) -> int:
+    with TemporaryDirectory() as tmp_dir, ProcessPoolExecutor() as pool:
+        state_path = Path(tmp_dir) / "state"
+        shape = prepare_state(input_path, state_path)
+        bands = _bands(shape[0])
+        empty_row = np.zeros(shape[1] - 1, dtype=int)
+
+        # Only the first and last row of every band stay in memory, to exchange them as halos
+        first_rows = _read_rows(state_path, shape, [start for start, _ in bands])
+        last_rows = _read_rows(state_path, shape, [end - 1 for _, end in bands])
+
+        total_removed = 0
+        active = set(range(len(bands)))
+        while active:
+            futures = {
+                idx: pool.submit(
+                    process_band,
+                    state_path,
+                    shape,
+                    *bands[idx],
+                    last_rows[idx - 1] if idx > 0 else empty_row,
+                    first_rows[idx + 1] if idx + 1 < len(bands) else empty_row,
+                    remove,
+                )
+                for idx in sorted(active)
+            }
+
+            current_removed = 0
+            changed = set()
+            for idx, future in futures.items():
+                band_removed, first_rows[idx], last_rows[idx] = future.result()
+                current_removed += band_removed
+                if band_removed:
+                    changed.add(idx)
+
+            total_removed += current_removed
+            if not remove:
+                break
+            console.print(f"Current removed: {current_removed} - Total removed so far: {total_removed}")
+
+            # A band can only change again if it or one of its neighbours changed
+            active = {
+                neighbour
+                for idx in changed
+                for neighbour in (idx - 1, idx, idx + 1)
+                if 0 <= neighbour < len(bands)
+            }
+
+    return total_removed
+
+
+@timer()
+def part1(input_data: Path) -> str:
+    result = remove_rolls_tiled(input_data, remove=False)
+
+    return str(result)
+
+@timer()
+def part2(input_data: Path) -> str:
+    result = remove_rolls_tiled(input_data, remove=True)
+
+    return str(result)
+
+def main(submit: bool = False):
+
+    part_functions = [part1, part2]
+
+    day_input = Path("input.txt")
+    if not day_input.is_file():
+        day_input.write_text(get_puzzle_input(YEAR, DAY), encoding="utf-8")
+
+    test_input = Path("test_input.txt")
+
+    for idx, part in enumerate(part_functions):
+        console.print()
+        console.print(f"Checking part {idx+1}")
+        test_result = part(test_input)
+        console.print(f"Part {idx+1} Test Result: {test_result}")
+
+        result = part(day_input)
+        console.print(f"Part {idx+1} Result: {result}")
+
+        if submit:
+            if result == "0":
+                console.print(f"Part {idx+1} has not been tried to resolve, skipping...")
+                continue
+            submission_result = submit_puzzle_answer(YEAR, DAY, idx+1, result)
+            console.print(submission_result.is_correct, submission_result.message)
+
+if __name__ == "__main__":
+    typer.run(main)
@@ -1,8 +1,11 @@
 import os
+from bisect import bisect_left, bisect_right
+from collections.abc import Iterable
 from functools import reduce
 from math import log10
 from pathlib import Path
 
+import numpy as np
 import polars as pl
 import typer
 from elf import (
@@ -27,6 +30,9 @@ LEADERBOARD = os.getenv("BOARD_ID")
 console = Console()
 
 DIAL_SIZE = 100
+# Most ranges in a block of FreshIntervalSet
+RANGE_BLOCK_SIZE = 1024
+
 
 def parse_input(input_data: str) -> tuple[list[str], list[str]]:
     fresh_ingredients, _, available_ingredients = input_data.partition("\n\n")
@@ -36,6 +42,260 @@ def parse_input(input_data: str) -> tuple[list[str], list[str]]:
 
     return fresh_ingredients, available_ingredients
 
+def merge_ranges(fresh_ingredients: list[str]) -> list[tuple[int, int]]:
+    sorted_ingredients = sorted(
+        [i for i in fresh_ingredients if i], key=lambda x: int(x.partition("-")[0])
+    )
+
+    all_ranges = []
+    for r in sorted_ingredients:
+        lower_bound, _, upper_bound = r.partition("-")
+        
+        lower_bound = int(lower_bound)
+        upper_bound = int(upper_bound)
+        # If there's no overlap, add a new range
+        if not all_ranges or all_ranges[-1][1] < lower_bound:
+            all_ranges.append((lower_bound, upper_bound))
+        # If there is overlap, enlarge latest range just with the new portion of range
+        else:
+            lower_bound = all_ranges[-1][0]
+            upper_bound = max(all_ranges[-1][1], upper_bound)
+            all_ranges[-1] = (lower_bound, upper_bound)
+
+    return all_ranges
+
+
+def merge_ranges_columnar(fresh_ingredients: list[str]) -> tuple[np.ndarray, np.ndarray]:
+    """Same merge as merge_ranges on two int64 columns, returns the merged starts and ends."""
+    ranges = [i for i in fresh_ingredients if i]
+    if not ranges:
+        return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64)
+
+    bounds = pl.read_csv(
+        "\n".join(ranges).encode(),
+        separator="-",
+        has_header=False,
+        schema={"start": pl.Int64, "end": pl.Int64},
+    )
+
+    # Starts and ends can be sorted on their own: the k smallest ends are never before the k
+    # smallest starts, so nothing is covered between the k-th end and the (k+1)-th start when
+    # that start comes after it, and that's exactly where a merged range finishes
+    starts = np.sort(bounds["start"].to_numpy())
+    ends = np.sort(bounds["end"].to_numpy())
+
+    new_range = np.ones(len(starts), dtype=bool)
+    new_range[1:] = starts[1:] > ends[:-1]
+
+    range_firsts = np.flatnonzero(new_range)
+    range_lasts = np.append(range_firsts[1:] - 1, len(starts) - 1)
+
+    return starts[range_firsts], ends[range_lasts]
+
+
+class FreshIndex:
+    """Disjoint sorted fresh ranges, so membership is a binary search per ID."""
+
+    def __init__(self, starts: np.ndarray, ends: np.ndarray):
+        self.starts = starts
+        self.ends = ends
+
+    @classmethod
+    def from_ranges(cls, fresh_ingredients: list[str]) -> "FreshIndex":
+        return cls(*merge_ranges_columnar(fresh_ingredients))
+
+    def contains(self, ids: np.ndarray) -> np.ndarray:
+        if len(self.starts) == 0:
+            return np.zeros(ids.shape, dtype=bool)
+        # Last range starting at or before every ID, then check the ID is not past its end
+        range_idx = np.searchsorted(self.starts, ids, side="right") - 1
+        return (range_idx >= 0) & (ids <= self.ends[np.maximum(range_idx, 0)])
+
+    def count_fresh(self, id_chunks: Iterable[np.ndarray]) -> int:
+        """Count the fresh IDs of a stream of ID chunks (duplicated IDs count every time)."""
+        return sum(int(self.contains(ids).sum()) for ids in id_chunks)
+
+
+class FreshIntervalSet:
+    """Mutable set of fresh IDs kept as disjoint sorted ranges, with the covered count kept up to date.
+
+    Overlapping ranges are merged like in part2. The ranges are stored like a SortedList: sorted
+    blocks of at most RANGE_BLOCK_SIZE ranges, with the first start and last end of every block
+    to find them. An update is a few binary searches and only rebuilds the blocks it touches,
+    splitting blocks that grow too big and merging the ones that get too small.
+    """
+
+    def __init__(self):
+        self.starts: list[list[int]] = []
+        self.ends: list[list[int]] = []
+        self.first_starts: list[int] = []
+        self.last_ends: list[int] = []
+        self.covered = 0
+
+    @classmethod
+    def from_ranges(cls, fresh_ingredients: list[str]) -> "FreshIntervalSet":
+        interval_set = cls()
+        for r in fresh_ingredients:
+            if r:
+                lower_bound, _, upper_bound = r.partition("-")
+                interval_set.insert_range(int(lower_bound), int(upper_bound))
+
+        return interval_set
+
+    def _overlapping(self, lower_bound: int, upper_bound: int) -> tuple[tuple[int, int], tuple[int, int]]:
+        # Ranges from `first` to `last` (excluded), as (block, index), are the ones ending at or after
+        # lower_bound and starting at or before upper_bound. When none does, `first` is where a
+        # range between them goes
+        first_block = bisect_left(self.last_ends, lower_bound)
+        if first_block == len(self.last_ends):
+            first = (first_block - 1, len(self.ends[-1])) if self.ends else (0, 0)
+        else:
+            first = (first_block, bisect_left(self.ends[first_block], lower_bound))
+
+        last_block = bisect_right(self.first_starts, upper_bound) - 1
+        if last_block < 0:
+            last = (0, 0)
+        else:
+            last = (last_block, bisect_right(self.starts[last_block], upper_bound))
+
+        return first, last
+
+    def _replace(self, first: tuple[int, int], last: tuple[int, int], new_ranges: list[tuple[int, int]]) -> None:
+        if not self.starts:
+            self.starts, self.ends, self.first_starts, self.last_ends = [[]], [[]], [0], [0]
+
+        (first_block, first_idx), (last_block, last_idx) = first, max(first, last)
+        for block in range(first_block, last_block + 1):
+            removed = slice(
+                first_idx if block == first_block else 0,
+                last_idx if block == last_block else None,
+            )
+            self.covered -= sum(map(int.__sub__, self.ends[block][removed], self.starts[block][removed]))
+            self.covered -= len(self.starts[block][removed])
+        self.covered += sum(upper_bound - lower_bound + 1 for lower_bound, upper_bound in new_ranges)
+
+        new_starts = [lower_bound for lower_bound, _ in new_ranges]
+        new_ends = [upper_bound for _, upper_bound in new_ranges]
+        if first_block == last_block:
+            self.starts[first_block][first_idx:last_idx] = new_starts
+            self.ends[first_block][first_idx:last_idx] = new_ends
+        else:
+            # What is left of the blocks up to last_block goes in the first one
+            self.starts[first_block][first_idx:] = new_starts + self.starts[last_block][last_idx:]
+            self.ends[first_block][first_idx:] = new_ends + self.ends[last_block][last_idx:]
+            for blocks in (self.starts, self.ends, self.first_starts, self.last_ends):
+                del blocks[first_block + 1:last_block + 1]
+
+        self._rebalance(first_block)
+
+    def _rebalance(self, block: int) -> None:
+        # Blocks grown too big are split in half, blocks left too small are merged with a neighbour
+        if len(self.starts[block]) > RANGE_BLOCK_SIZE:
+            middle = len(self.starts[block]) // 2
+            self.starts.insert(block + 1, self.starts[block][middle:])
+            self.ends.insert(block + 1, self.ends[block][middle:])
+            del self.starts[block][middle:], self.ends[block][middle:]
+            self.first_starts.insert(block + 1, 0)
+            self.last_ends.insert(block + 1, 0)
+            self._update_bounds(block + 1)
+        elif len(self.starts[block]) < RANGE_BLOCK_SIZE // 4 and len(self.starts) > 1:
+            block = block if block + 1 < len(self.starts) else block - 1
+            self.starts[block] += self.starts.pop(block + 1)
+            self.ends[block] += self.ends.pop(block + 1)
+            del self.first_starts[block + 1], self.last_ends[block + 1]
+            return self._rebalance(block)
+        elif not self.starts[block]:
+            for blocks in (self.starts, self.ends, self.first_starts, self.last_ends):
+                del blocks[block]
+            return
+
+        self._update_bounds(block)
+
+    def _update_bounds(self, block: int) -> None:
+        self.first_starts[block] = self.starts[block][0]
+        self.last_ends[block] = self.ends[block][-1]
+
+    def _range(self, position: tuple[int, int]) -> tuple[int, int]:
+        block, idx = position
+        return self.starts[block][idx], self.ends[block][idx]
+
+    def insert_range(self, lower_bound: int, upper_bound: int) -> None:
+        first, last = self._overlapping(lower_bound, upper_bound)
+        if first < last:
+            lower_bound = min(lower_bound, self._range(first)[0])
+            upper_bound = max(upper_bound, self._range((last[0], last[1] - 1))[1])
+
+        self._replace(first, last, [(lower_bound, upper_bound)])
+
+    def remove_range(self, lower_bound: int, upper_bound: int) -> None:
+        first, last = self._overlapping(lower_bound, upper_bound)
+        if first >= last:
+            return
+
+        # Only the first and last overlapping ranges can keep a piece sticking out
+        new_ranges = []
+        first_start, _ = self._range(first)
+        _, last_end = self._range((last[0], last[1] - 1))
+        if first_start < lower_bound:
+            new_ranges.append((first_start, lower_bound - 1))
+        if last_end > upper_bound:
+            new_ranges.append((upper_bound + 1, last_end))
+
+        self._replace(first, last, new_ranges)
+
+    def contains(self, ingredient_id: int) -> bool:
+        block = bisect_right(self.first_starts, ingredient_id) - 1
+        if block < 0:
+            return False
+        idx = bisect_right(self.starts[block], ingredient_id) - 1
+        return ingredient_id <= self.ends[block][idx]
+
+    def ranges(self) -> list[tuple[int, int]]:
+        return [r for starts, ends in zip(self.starts, self.ends) for r in zip(starts, ends)]
+
+
+@timer()
+def part1_dynamic(input_data: tuple[list[str], list[str]]) -> str:
+    fresh_ingredients, available_ingredients = input_data
+
+    interval_set = FreshIntervalSet.from_ranges(fresh_ingredients)
+
+    result = sum(interval_set.contains(i) for i in {int(i) for i in available_ingredients if i})
+
+    return str(result)
+
+@timer()
+def part2_dynamic(input_data: tuple[list[str], list[str]]) -> str:
+    fresh_ingredients, available_ingredients = input_data
+
+    interval_set = FreshIntervalSet.from_ranges(fresh_ingredients)
+
+    return str(interval_set.covered)
+
+
+@timer()
+def part1_index(input_data: tuple[list[str], list[str]]) -> str:
+    fresh_ingredients, available_ingredients = input_data
+
+    index = FreshIndex.from_ranges(fresh_ingredients)
+    # Same as part1, every available ID only counts once
+    available_ids = np.unique(np.array([int(i) for i in available_ingredients if i], dtype=np.int64))
+
+    result = index.count_fresh([available_ids])
+
+    return str(result)
+
+@timer()
+def part2_columnar(input_data: tuple[list[str], list[str]]) -> str:
+    fresh_ingredients, available_ingredients = input_data
+
+    starts, ends = merge_ranges_columnar(fresh_ingredients)
+
+    # Merged ranges are disjoint int64 ranges, so their total length always fits in a uint64
+    result = int((ends - starts + 1).sum(dtype=np.uint64))
+
+    return str(result)
+
 @timer()
 def part1(input_data: tuple[list[str], list[str]]) -> str:
     fresh_ingredients, available_ingredients = input_data
@@ -79,27 +339,7 @@ def part1(input_data: tuple[list[str], list[str]]) -> str:
 def part2(input_data: tuple[list[str], list[str]]) -> str:
     fresh_ingredients, available_ingredients = input_data
 
-    sorted_ingredients = sorted(
-        [i for i in fresh_ingredients if i], key=lambda x: int(x.partition("-")[0])
-    )
-
-    # console.print(sorted_ingredients)
-
-    all_ranges = []
-    all_sum = 0
-    for r in sorted_ingredients:
-        lower_bound, _, upper_bound = r.partition("-")
-        
-        lower_bound = int(lower_bound)
-        upper_bound = int(upper_bound)
-        # If there's no overlap, add a new range
-        if not all_ranges or all_ranges[-1][1] < lower_bound:
-            all_ranges.append((lower_bound, upper_bound))
-        # If there is overlap, enlarge latest range just with the new portion of range
-        else:
-            lower_bound = all_ranges[-1][0]
-            upper_bound = max(all_ranges[-1][1], upper_bound)
-            all_ranges[-1] = (lower_bound, upper_bound)
+    all_ranges = merge_ranges(fresh_ingredients)
 
     console.print(all_ranges)
 
@@ -111,9 +351,15 @@ def part2(input_data: tuple[list[str], list[str]]) -> str:
     return result
 
 
-def main(submit: bool = False):
+ENGINES = {
+    "polars": [part1, part2],
+    "index": [part1_index, part2_columnar],
+    "dynamic": [part1_dynamic, part2_dynamic],
+}
+
+def main(submit: bool = False, engine: str = "polars"):
 
-    part_functions = [part1, part2]
+    part_functions = ENGINES[engine]
 
     day_input = parse_input(get_puzzle_input(YEAR, DAY))
     # print(day_input)
@@ -1,10 +1,12 @@
 import os
 import re
+from collections.abc import Callable
 from functools import reduce
 from io import StringIO
-from math import log10
+from math import log10, prod
 from pathlib import Path
 
+import numpy as np
 import polars as pl
 import polars.selectors as cs
 import typer
@@ -29,6 +31,15 @@ LEADERBOARD = os.getenv("BOARD_ID")
 
 console = Console()
 
+SPACE = ord(" ")
+ZERO = ord("0")
+MULTIPLY = ord("*")
+# Largest number of digits an int64 can hold for sure
+MAX_INT64_DIGITS = 18
+POWERS_OF_TEN = 10 ** np.arange(MAX_INT64_DIGITS + 1, dtype=np.int64)
+
+STREAM_BLOCK_WIDTH = 1 << 20
+
 def read_input(path: Path) -> str:
     """Read input from a file and return its contents."""
     if not path.is_file():
@@ -44,6 +55,178 @@ def parse_input_part2(input_data: str) -> list[str]:
     return [l_clean for l in input_data.replace(" ", "0").split("\n") if (l_clean := l.strip())]
 
 
+def parse_sheet(input_data: str | bytes) -> np.ndarray:
+    """View the worksheet as a (rows, columns) uint8 matrix, the last row holds the operations."""
+    raw = input_data.encode() if isinstance(input_data, str) else input_data
+    raw = raw.strip(b"\n") + b"\n"
+    width = raw.index(b"\n") + 1
+
+    if len(raw) % width == 0:
+        sheet = np.frombuffer(raw, dtype=np.uint8).reshape(-1, width)
+        if (sheet[:, -1] == ord("\n")).all():
+            return sheet[:, :-1]
+
+    # Rows of different lengths cannot be a plain view, pad them with spaces instead
+    lines = raw.split(b"\n")[:-1]
+    width = max(len(line) for line in lines)
+    return np.frombuffer(b"".join(line.ljust(width) for line in lines), dtype=np.uint8).reshape(-1, width)
+
+
+def _problem_starts(sheet: np.ndarray) -> np.ndarray:
+    # Problems are separated by columns with nothing but spaces
+    non_blank = (sheet != SPACE).any(axis=0)
+    return np.flatnonzero(non_blank & ~np.concatenate([[False], non_blank[:-1]]))
+
+
+def _digit_values(digits: np.ndarray, places: np.ndarray, is_digit: np.ndarray) -> np.ndarray:
+    if places[is_digit].max(initial=0) > MAX_INT64_DIGITS:
+        raise ValueError(f"Numbers with more than {MAX_INT64_DIGITS + 1} digits do not fit in an int64")
+
+    return np.where(is_digit, (digits.astype(np.int64) - ZERO) * POWERS_OF_TEN[np.where(is_digit, places, 0)], 0)
+
+
+def evaluate_problems(
+    numbers: np.ndarray, present: np.ndarray, problem_starts: np.ndarray, operations: np.ndarray
+) -> int:
+    """Add up every problem, problem i being numbers[problem_starts[i]:problem_starts[i + 1]]."""
+    is_product = operations == MULTIPLY
+    sums = np.add.reduceat(np.where(present, numbers, 0), problem_starts)
+    factors = np.where(present, numbers, 1)
+    products = np.multiply.reduceat(factors, problem_starts)
+
+    # int64 products wrap around silently: any product that might not fit is redone with Python ints
+    product_digits = np.add.reduceat(np.log10(np.maximum(factors, 1)), problem_starts)
+    results = np.where(is_product, products, sums).astype(object)
+    problem_ends = np.append(problem_starts[1:], len(numbers))
+    for problem in np.flatnonzero(is_product & (product_digits >= MAX_INT64_DIGITS)):
+        results[problem] = prod(int(n) for n in factors[problem_starts[problem]:problem_ends[problem]])
+
+    return sum(results.tolist())
+
+
+def evaluate_rows(sheet: np.ndarray) -> int:
+    """Total of the problems in the sheet, reading numbers row by row (part 1)."""
+    digits, operations = sheet[:-1], sheet[-1]
+    problem_starts = _problem_starts(sheet)
+    if not len(problem_starts):
+        return 0
+    is_digit = digits != SPACE
+
+    # Place value of every digit is how many digits of the same row and problem come after it
+    problem_ends = np.append(problem_starts[1:], digits.shape[1]) - 1
+    column_problem = np.maximum(np.searchsorted(problem_starts, np.arange(digits.shape[1]), side="right") - 1, 0)
+    digit_count = np.cumsum(is_digit, axis=1)
+    places = digit_count[:, problem_ends[column_problem]] - digit_count
+
+    numbers = np.add.reduceat(_digit_values(digits, places, is_digit), problem_starts, axis=1)
+    present = np.add.reduceat(is_digit, problem_starts, axis=1) > 0
+
+    # Lay the numbers problem after problem to reduce them the same way as part 2
+    return evaluate_problems(
+        numbers.T.ravel(),
+        present.T.ravel(),
+        np.arange(len(problem_starts)) * digits.shape[0],
+        np.maximum.reduceat(operations, problem_starts),
+    )
+
+
+def evaluate_columns(sheet: np.ndarray) -> int:
+    """Total of the problems in the sheet, reading numbers column by column (part 2)."""
+    digits, operations = sheet[:-1], sheet[-1]
+    problem_starts = _problem_starts(sheet)
+    if not len(problem_starts):
+        return 0
+    is_digit = digits != SPACE
+
+    # Every column is a number read top to bottom, so a digit's place is how many digits are below it
+    places = is_digit.sum(axis=0) - np.cumsum(is_digit, axis=0)
+
+    return evaluate_problems(
+        _digit_values(digits, places, is_digit).sum(axis=0),
+        is_digit.any(axis=0),
+        problem_starts,
+        np.maximum.reduceat(operations, problem_starts),
+    )
+
+
+def _row_offsets(path: Path) -> list[tuple[int, int]]:
+    # Byte offset and length of every non empty row, reading the file a block at a time
+    rows = []
+    row_start = 0
+    position = 0
+    with path.open("rb") as f:
+        while block := f.read(STREAM_BLOCK_WIDTH):
+            newline = block.find(b"\n")
+            while newline != -1:
+                rows.append((row_start, position + newline - row_start))
+                row_start = position + newline + 1
+                newline = block.find(b"\n", newline + 1)
+            position += len(block)
+    rows.append((row_start, position - row_start))
+
+    return [(offset, length) for offset, length in rows if length]
+
+
+def _read_block(f, rows: list[tuple[int, int]], start: int, width: int) -> np.ndarray:
+    block = np.full((len(rows), width), SPACE, dtype=np.uint8)
+    for idx, (offset, length) in enumerate(rows):
+        if start < length:
+            f.seek(offset + start)
+            data = f.read(min(width, length - start))
+            block[idx, :len(data)] = np.frombuffer(data, dtype=np.uint8)
+
+    return block
+
+
+def stream_sheet(
+    path: Path, evaluate: Callable[[np.ndarray], int], block_width: int = STREAM_BLOCK_WIDTH
+) -> int:
+    """Evaluate a very wide worksheet one block of columns at a time.
+
+    Every block is cut at its last blank column so no problem is split, and the next block
+    starts right after it. A problem wider than the block makes the block grow until it fits.
+    """
+    rows = _row_offsets(path)
+    sheet_width = max(length for _, length in rows)
+
+    total = 0
+    start = 0
+    width = block_width
+    with path.open("rb") as f:
+        while start < sheet_width:
+            block = _read_block(f, rows, start, width)
+            if start + width >= sheet_width:
+                return total + evaluate(block)
+
+            blank_columns = np.flatnonzero((block == SPACE).all(axis=0))
+            if not len(blank_columns):
+                width *= 2
+                continue
+
+            total += evaluate(block[:, :blank_columns[-1]])
+            start += blank_columns[-1] + 1
+            width = block_width
+
+    return total
+
+
+@timer()
+def part1_matrix(input_data: np.ndarray) -> str:
+    return str(evaluate_rows(input_data))
+
+@timer()
+def part2_matrix(input_data: np.ndarray) -> str:
+    return str(evaluate_columns(input_data))
+
+@timer()
+def part1_streaming(input_data: Path) -> str:
+    return str(stream_sheet(input_data, evaluate_rows))
+
+@timer()
+def part2_streaming(input_data: Path) -> str:
+    return str(stream_sheet(input_data, evaluate_columns))
+
+
 @timer()
 def part1(input_data: list[str]) -> str:
     n_columns = len(input_data[0])
@@ -129,17 +312,31 @@ def part2(input_data: list[str]) -> str:
 
 
 
-def main(submit: bool = False):
+def main(submit: bool = False, matrix: bool = False, streaming: bool = False):
 
-    part_functions = [part1, part2]
-    parse_functions = [parse_input_part1, parse_input_part2]
+    if streaming:
+        part_functions = [part1_streaming, part2_streaming]
+    elif matrix:
+        part_functions = [part1_matrix, part2_matrix]
+        parse_functions = [parse_sheet, parse_sheet]
+    else:
+        part_functions = [part1, part2]
+        parse_functions = [parse_input_part1, parse_input_part2]
 
     for idx, part in enumerate(part_functions):
-        day_input = parse_functions[idx](get_puzzle_input(YEAR, DAY))
-        # print(day_input)
+        if streaming:
+            # Streaming reads straight from the files
+            day_input = Path("input.txt")
+            if not day_input.is_file():
+                day_input.write_text(get_puzzle_input(YEAR, DAY), encoding="utf-8")
+
+            test_input = Path("test_input.txt")
+        else:
+            day_input = parse_functions[idx](get_puzzle_input(YEAR, DAY))
+            # print(day_input)
 
-        test_input = parse_functions[idx](read_input(Path("test_input.txt")))
-        # print(test_input)
+            test_input = parse_functions[idx](read_input(Path("test_input.txt")))
+            # print(test_input)
 
     
         test_result = part(test_input)
@@ -2,6 +2,7 @@ import os
 from collections import defaultdict
 from pathlib import Path
 
+import numpy as np
 import typer
 from elf import (
     get_puzzle_input,
@@ -19,11 +20,199 @@ LEADERBOARD = os.getenv("BOARD_ID")
 
 console = Console()
 
+EMPTY = ord(".")
+SPLITTER = ord("^")
+START = ord("S")
+# Past this a count could overflow an int64 after one more row (a cell gets at most 3 counts)
+MAX_SAFE_COUNT = np.iinfo(np.int64).max // 3
+# Cells of the grid checked at once
+GRID_BLOCK_CELLS = 1 << 22
+
 
 def parse_input(input_data: str) -> list[list[str]]:
     return [list(l) for l in input_data.split("\n") if l]
 
 
+def parse_grid(input_data: str) -> np.ndarray:
+    lines = [l for l in input_data.split("\n") if l]
+    return np.frombuffer("".join(lines).encode(), dtype=np.uint8).reshape(len(lines), -1)
+
+
+def check_grid(grid: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """Raise on anything below the first row that is not empty space or a splitter.
+
+    Returns the rows and columns of the splitters, in row order. Goes a block of rows at a time
+    so the masks stay small next to the grid.
+    """
+    block_rows = max(1, GRID_BLOCK_CELLS // max(1, grid.shape[1]))
+    rows, cols = [np.empty(0, dtype=np.int64)], [np.empty(0, dtype=np.int64)]
+    for block_start in range(1, len(grid), block_rows):
+        block = grid[block_start:block_start + block_rows]
+        is_splitter = block == SPLITTER
+        unexpected = ~(is_splitter | (block == EMPTY))
+        if unexpected.any():
+            row_idx, col_idx = np.argwhere(unexpected)[0]
+            raise ValueError(
+                f"Unexpected character {chr(block[row_idx, col_idx])} at {(int(block_start + row_idx), int(col_idx))}"
+            )
+        # Much faster than np.nonzero on the 2D mask
+        block_rows_idx, block_cols = np.divmod(np.flatnonzero(is_splitter), grid.shape[1])
+        rows.append(block_rows_idx + block_start)
+        cols.append(block_cols)
+
+    return np.concatenate(rows), np.concatenate(cols)
+
+
+def sweep_beams(grid: np.ndarray) -> tuple[int, int]:
+    """Push the beams down the manifold a whole row at a time, returns (splits, timelines).
+
+    The beams of a row are a vector with how many timelines reach every column, a splitter
+    row sends the counts hitting its splitters one column to each side.
+    """
+    rows, cols = check_grid(grid)
+
+    col_start = int(np.flatnonzero(grid[0] == START)[0])
+    # One extra column on each side catches the beams leaving the manifold
+    beams = np.zeros(grid.shape[1] + 2, dtype=np.int64)
+    beams[col_start + 1] = 1
+    cols = cols + 1
+    left_cols, right_cols = cols - 1, cols + 1
+
+    splits = 0
+    # A column keeps its count and gets one from each side at most, so counts can only triple
+    # every row. Tracking that bound saves looking for the actual maximum on every row
+    count_bound = 1
+    # Rows without splitters leave the beams as they are, so only splitter rows need work
+    row_ends = np.append(np.flatnonzero(np.diff(rows)) + 1, len(rows)).tolist()
+    for row_start, row_end in zip([0] + row_ends, row_ends):
+        splitter_cols = cols[row_start:row_end]
+        hits = beams[splitter_cols]
+        splits += int(np.count_nonzero(hits))
+
+        beams[splitter_cols] = 0
+        beams[left_cols[row_start:row_end]] += hits
+        beams[right_cols[row_start:row_end]] += hits
+
+        # Switch to exact Python ints once the counts get too close to the int64 limit
+        if beams.dtype != object:
+            count_bound *= 3
+            if count_bound > MAX_SAFE_COUNT:
+                count_bound = int(beams.max())
+                if count_bound > MAX_SAFE_COUNT:
+                    beams = beams.astype(object)
+
+    return splits, int(beams[1:-1].sum())
+
+
+def timelines_by_start(grid: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """Splits and timelines for a beam starting in every column, both indexed by column.
+
+    Goes bottom up: what a beam entering a row at a column ends up doing is known from the row
+    below, so every start column comes out of the same pass. Splitters reached are tracked as
+    bitsets (Python ints, one bit per splitter) because paths can meet on the same splitter.
+    """
+    timelines = np.ones(grid.shape[1], dtype=np.int64)
+    reached = np.zeros(grid.shape[1], dtype=object)
+
+    splitter_rows = np.flatnonzero((grid[1:] == SPLITTER).any(axis=1)) + 1
+    splitter_bit = 0
+    for row_idx in splitter_rows[::-1]:
+        is_splitter = grid[row_idx] == SPLITTER
+        splitter_cols = np.flatnonzero(is_splitter)
+
+        from_sides = np.zeros_like(timelines)
+        from_sides[:-1] += timelines[1:]
+        from_sides[1:] += timelines[:-1]
+        timelines = np.where(is_splitter, from_sides, timelines)
+
+        reached_sides = np.zeros_like(reached)
+        reached_sides[:-1] |= reached[1:]
+        reached_sides[1:] |= reached[:-1]
+        own_bits = np.array([1 << (splitter_bit + i) for i in range(len(splitter_cols))], dtype=object)
+        reached[splitter_cols] = reached_sides[splitter_cols] | own_bits
+        splitter_bit += len(splitter_cols)
+
+        if timelines.dtype != object and timelines.max() > MAX_SAFE_COUNT:
+            timelines = timelines.astype(object)
+
+    splits = np.array([bits.bit_count() for bits in reached], dtype=np.int64)
+
+    return splits, timelines
+
+
+def propagate_splitters(grid: np.ndarray) -> tuple[int, int]:
+    """Same as sweep_beams, but jumping from splitter to splitter instead of going row by row.
+
+    Every splitter sends its beams to the next splitter below it in the columns on each side,
+    which makes a DAG in row order, so the work depends on the splitters and not on the rows.
+    """
+    # Splitters in row order, which is also a topological order of the DAG
+    rows, cols = check_grid(grid)
+    n_splitters = len(rows)
+
+    # Same splitters sorted by column then row, to find the next splitter below any cell
+    by_column = np.lexsort((rows, cols))
+    column_keys = cols[by_column].astype(np.int64) * grid.shape[0] + rows[by_column]
+
+    def next_splitter(query_cols: np.ndarray, query_rows: np.ndarray) -> np.ndarray:
+        # Id of the next splitter below each (row, col), -1 when the beam leaves the manifold
+        idx = np.searchsorted(column_keys, query_cols.astype(np.int64) * grid.shape[0] + query_rows, side="right")
+        found = (idx < n_splitters) & (query_cols >= 0) & (query_cols < grid.shape[1])
+        found[found] &= cols[by_column[idx[found]]] == query_cols[found]
+        return np.where(found, by_column[np.minimum(idx, n_splitters - 1)], -1)
+
+    col_start = int(np.flatnonzero(grid[0] == START)[0])
+    first_splitter = next_splitter(np.array([col_start]), np.array([0]))[0] if n_splitters else -1
+    left_children = next_splitter(cols - 1, rows).tolist()
+    right_children = next_splitter(cols + 1, rows).tolist()
+
+    if first_splitter == -1:
+        return 0, 1
+
+    counts = [0] * n_splitters
+    counts[first_splitter] = 1
+    splits = 0
+    timelines = 0
+    for splitter in range(first_splitter, n_splitters):
+        count = counts[splitter]
+        if not count:
+            continue
+        splits += 1
+        for side_col, child in ((cols[splitter] - 1, left_children[splitter]), (cols[splitter] + 1, right_children[splitter])):
+            if child != -1:
+                counts[child] += count
+            elif 0 <= side_col < grid.shape[1]:
+                timelines += count
+
+    return splits, timelines
+
+
+@timer()
+def part1_events(input_data: np.ndarray) -> str:
+    splits, _ = propagate_splitters(input_data)
+
+    return str(splits)
+
+@timer()
+def part2_events(input_data: np.ndarray) -> str:
+    _, timelines = propagate_splitters(input_data)
+
+    return str(timelines)
+
+
+@timer()
+def part1_vectorized(input_data: np.ndarray) -> str:
+    splits, _ = sweep_beams(input_data)
+
+    return str(splits)
+
+@timer()
+def part2_vectorized(input_data: np.ndarray) -> str:
+    _, timelines = sweep_beams(input_data)
+
+    return str(timelines)
+
+
 @timer()
 def part1(input_data: list[list[str]]) -> str:
     col_start = input_data[0].index("S")
@@ -105,13 +294,20 @@ def part2(input_data: list[list[str]]) -> str:
     return str(sum(beams_to_check.values()))
 
 
-def main(submit: bool = False):
-    part_functions = [part1, part2]
+ENGINES = {
+    "loop": ([part1, part2], parse_input),
+    "vectorized": ([part1_vectorized, part2_vectorized], parse_grid),
+    "events": ([part1_events, part2_events], parse_grid),
+}
+
+
+def main(submit: bool = False, engine: str = "loop"):
+    part_functions, parse_function = ENGINES[engine]
 
-    day_input = parse_input(get_puzzle_input(YEAR, DAY))
+    day_input = parse_function(get_puzzle_input(YEAR, DAY))
     # print(day_input)
 
-    test_input = parse_input(read_input(Path("test_input.txt")))
+    test_input = parse_function(read_input(Path("test_input.txt")))
     # print(test_input)
 
     for idx, part in enumerate(part_functions):
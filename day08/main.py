@@ -1,11 +1,14 @@
 import os
 import re
+from collections import Counter, defaultdict
+from collections.abc import Iterator
 from functools import cache, reduce
 from io import StringIO
-from itertools import combinations
-from math import log10
+from itertools import combinations, islice, product
+from math import isqrt, log10
 from pathlib import Path
 
+import numpy as np
 import polars as pl
 import polars_ds as pds
 import polars.selectors as cs
@@ -19,6 +22,7 @@ from elf import (
 )
 from elf.helpers import timer
 from rich.console import Console
+from scipy.spatial import cKDTree
 
 pl.Config.set_tbl_rows(20)
 pl.Config.set_tbl_cols(20)
@@ -31,6 +35,15 @@ LEADERBOARD = os.getenv("BOARD_ID")
 
 console = Console()
 
+CONNECTIONS = 1000
+# Neighbours per point asked to the KD-tree at first, doubled every time Kruskal runs out of edges
+NEIGHBOURS = 8
+
+# 16 bytes per edge: both point indexes and the exact squared distance, no sqrt needed to sort
+EDGE_DTYPE = np.dtype([("i", np.int32), ("j", np.int32), ("weight", np.int64)])
+EDGE_BLOCK_ROWS = 1024
+EDGE_CHUNK_SIZE = 1 << 16
+
 def read_input(path: Path) -> str:
     """Read input from a file and return its contents."""
     if not path.is_file():
@@ -68,13 +81,385 @@ class Edge:
     def __repr__(self):
         return f"{self.p1} <-> {self.p2} : {self.weight:.2f}"
 
-def find_sets(p: Point, sets: list[set[Point]]):
-    for idx, s in enumerate(sets):
-        if p in s:
-            return idx
-    
-    raise ValueError(f"Point {p} not found in any set")
+class DisjointSet:
+    """Union-find over point indexes, with union by size and path compression.
+
+    Also keeps how many circuits are left and how many circuits there are of every size.
+    """
+
+    def __init__(self, n_points: int):
+        self.parent = list(range(n_points))
+        self.size = [1] * n_points
+        self.components = n_points
+        self.size_histogram = Counter({1: n_points}) if n_points else Counter()
+
+    def add(self) -> int:
+        """Add a new point in a circuit of its own, returns its index."""
+        self.parent.append(len(self.parent))
+        self.size.append(1)
+        self.components += 1
+        self.size_histogram[1] += 1
+
+        return len(self.parent) - 1
+
+    def find(self, p: int) -> int:
+        root = p
+        while self.parent[root] != root:
+            root = self.parent[root]
+        while self.parent[p] != root:
+            self.parent[p], p = root, self.parent[p]
+
+        return root
 
+    def union(self, p1: int, p2: int) -> bool:
+        """Join the circuits of both points, False if they were already the same circuit."""
+        root1, root2 = self.find(p1), self.find(p2)
+        if root1 == root2:
+            return False
+
+        if self.size[root1] < self.size[root2]:
+            root1, root2 = root2, root1
+        for size in (self.size[root1], self.size[root2]):
+            self.size_histogram[size] -= 1
+            if not self.size_histogram[size]:
+                del self.size_histogram[size]
+
+        self.parent[root2] = root1
+        self.size[root1] += self.size[root2]
+        self.size_histogram[self.size[root1]] += 1
+        self.components -= 1
+
+        return True
+
+    def largest(self, n: int) -> list[int]:
+        sizes = []
+        for size in sorted(self.size_histogram, reverse=True):
+            sizes.extend([size] * min(self.size_histogram[size], n - len(sizes)))
+            if len(sizes) == n:
+                break
+
+        return sizes
+
+
+class CircuitClusterer:
+    """Circuits built online: every new junction box is wired to the boxes within threshold.
+
+    Boxes are hashed in a grid of cells wider than the threshold distance, so a new box only
+    has to be compared with the boxes in its own and the 26 surrounding cells.
+    """
+
+    def __init__(self, threshold: int):
+        # Threshold is a squared distance, like the edge weights
+        self.threshold = threshold
+        self.cell_size = isqrt(threshold) + 1
+        self.cells: defaultdict[tuple[int, int, int], list[int]] = defaultdict(list)
+        self.points: list[tuple[int, int, int]] = []
+        self.circuits = DisjointSet(0)
+        self.edges = 0
+
+    def _cell(self, point: tuple[int, int, int]) -> tuple[int, int, int]:
+        return tuple(coordinate // self.cell_size for coordinate in point)
+
+    def insert(self, point: tuple[int, int, int]) -> int:
+        idx = self.circuits.add()
+        cell = self._cell(point)
+
+        for offset in product((-1, 0, 1), repeat=3):
+            neighbour_cell = tuple(c + o for c, o in zip(cell, offset))
+            for other in self.cells.get(neighbour_cell, ()):
+                if sum((a - b) ** 2 for a, b in zip(point, self.points[other])) <= self.threshold:
+                    self.edges += 1
+                    self.circuits.union(idx, other)
+
+        self.cells[cell].append(idx)
+        self.points.append(point)
+
+        return idx
+
+    def largest(self, n: int = 3) -> list[int]:
+        return self.circuits.largest(n)
+
+
+def parse_points(input_data: str) -> np.ndarray:
+    return np.array(
+        [list(map(int, l.split(","))) for l in input_data.strip().split("\n")], dtype=np.int64
+    )
+
+
+def squared_distances(points: np.ndarray, i: np.ndarray, j: np.ndarray) -> np.ndarray:
+    return ((points[i] - points[j]) ** 2).sum(axis=1)
+
+
+def nearest_edges(points: np.ndarray, neighbours: int = NEIGHBOURS) -> Iterator[tuple[int, int, int]]:
+    """Lazily yield (squared distance, i, j) edges, i < j, shortest first.
+
+    Edges come from the k nearest neighbours of every point, with its own k per point. An edge
+    shorter than the distance to the k-th neighbour of every point is in both neighbour lists,
+    so all edges below that bound are known and can go out in order. Past it, k is doubled only
+    for the points whose k-th neighbour is close to the bound, so isolated points are not queried
+    again until the edges reach them. Ties keep the order of combinations(points, 2).
+
+    A dense cluster still has to list all its inner edges before any edge leaving it comes out,
+    so on clustered inputs walking every edge costs O(cluster size ** 2). part2_prim does not.
+    """
+    n_points = len(points)
+    tree = cKDTree(points)
+    no_bound = np.iinfo(np.int64).max
+
+    k = np.full(n_points, min(neighbours, n_points - 1))
+    # Squared distance to the k-th neighbour, every neighbour closer than that is known
+    reach = np.empty(n_points, dtype=np.int64)
+    pending_pairs = np.empty(0, dtype=np.int64)
+    pending_weights = np.empty(0, dtype=np.int64)
+    lower_bound = 0
+    to_query = np.arange(n_points)
+
+    while True:
+        for query_k in np.unique(k[to_query]).tolist():
+            idx = to_query[k[to_query] == query_k]
+            _, neighbour_idx = tree.query(points[idx], k=query_k + 1)
+            neighbour_idx = neighbour_idx.reshape(len(idx), query_k + 1)
+            if query_k == n_points - 1:
+                reach[idx] = no_bound
+            else:
+                reach[idx] = squared_distances(points, idx, neighbour_idx[:, -1])
+
+            i = np.repeat(idx, query_k + 1)
+            j = neighbour_idx.ravel()
+            i, j = np.minimum(i, j)[i != j], np.maximum(i, j)[i != j]
+            weights = squared_distances(points, i, j)
+            # Anything below the lower bound is already out
+            new = weights >= lower_bound
+            pending_pairs = np.concatenate([pending_pairs, i[new] * n_points + j[new]])
+            pending_weights = np.concatenate([pending_weights, weights[new]])
+
+        pending_pairs, first = np.unique(pending_pairs, return_index=True)
+        pending_weights = pending_weights[first]
+
+        upper_bound = int(reach.min())
+        in_batch = pending_weights < upper_bound
+        pairs, weights = pending_pairs[in_batch], pending_weights[in_batch]
+        pending_pairs, pending_weights = pending_pairs[~in_batch], pending_weights[~in_batch]
+
+        i, j = pairs // n_points, pairs % n_points
+        order = np.lexsort((j, i, weights))
+        yield from zip(weights[order].tolist(), i[order].tolist(), j[order].tolist())
+
+        if upper_bound == no_bound:
+            return
+        lower_bound = upper_bound
+        # Points holding the bound back, plus those about to, twice as far
+        to_query = np.flatnonzero(reach <= min(4 * upper_bound, no_bound - 1))
+        k[to_query] = np.minimum(2 * k[to_query], n_points - 1)
+
+
+def pair_edges(points: np.ndarray, block_rows: int = EDGE_BLOCK_ROWS) -> np.ndarray:
+    """Every i < j edge as a structured array, built a block of rows of the upper triangle at a time.
+
+    Edges come out in combinations(points, 2) order.
+    """
+    n_points = len(points)
+    edges = np.empty(n_points * (n_points - 1) // 2, dtype=EDGE_DTYPE)
+
+    offset = 0
+    for block_start in range(0, n_points, block_rows):
+        block_end = min(block_start + block_rows, n_points)
+        i, j = np.nonzero(np.arange(n_points)[None, :] > np.arange(block_start, block_end)[:, None])
+        i += block_start
+
+        block = edges[offset:offset + len(i)]
+        block["i"] = i
+        block["j"] = j
+        block["weight"] = squared_distances(points, i, j)
+        offset += len(i)
+
+    return edges
+
+
+def shortest_edges(edges: np.ndarray, k: int) -> np.ndarray:
+    """The k shortest edges in order, without sorting all of them."""
+    if k >= len(edges):
+        return edges[np.lexsort((edges["j"], edges["i"], edges["weight"]))]
+
+    weights = edges["weight"]
+    kth_weight = weights[np.argpartition(weights, k - 1)[k - 1]]
+
+    # Edges tied with the k-th one go in combinations order, like in the stable sort of part1
+    shorter = edges[weights < kth_weight]
+    tied = edges[np.flatnonzero(weights == kth_weight)[:k - len(shorter)]]
+    shorter = shorter[np.lexsort((shorter["j"], shorter["i"], shorter["weight"]))]
+
+    return np.concatenate([shorter, tied])
+
+
+def sorted_edge_chunks(edges: np.ndarray, chunk_size: int = EDGE_CHUNK_SIZE) -> Iterator[np.ndarray]:
+    """Yield the edges sorted, a chunk at a time, only sorting what gets asked for.
+
+    Chunks double in size, so sorting all of them costs about one sort of the edges. The weights
+    splitting the chunks are found with a single partition and every edge is tagged with its
+    chunk, so a chunk is pulled out of the edges without copying the ones left.
+    """
+    if not len(edges):
+        return
+
+    # Chunks end at ranks chunk_size, 3 * chunk_size, 7 * chunk_size...
+    chunk_ends = chunk_size * (2 ** np.arange(max(1, len(edges) // chunk_size).bit_length()) * 2 - 1)
+    kths = chunk_ends[chunk_ends < len(edges)] - 1
+    split_weights = np.partition(edges["weight"], kths)[kths]
+
+    # Ties with a split weight stay in the chunk ending there
+    chunk_ids = np.empty(len(edges), dtype=np.uint8)
+    for block_start in range(0, len(edges), EDGE_CHUNK_SIZE):
+        block = slice(block_start, block_start + EDGE_CHUNK_SIZE)
+        chunk_ids[block] = np.searchsorted(split_weights, edges["weight"][block])
+
+    for chunk_id in range(len(split_weights) + 1):
+        chunk = edges[chunk_ids == chunk_id]
+        yield chunk[np.lexsort((chunk["j"], chunk["i"], chunk["weight"]))]
+
+
+def prim_last_edge(points: np.ndarray) -> tuple[int, int, int]:
+    """Longest edge of the minimum spanning tree, as (squared distance, i, j), using dense Prim.
+
+    That's the edge that finally joins everything in a single circuit. Only the distance from
+    every point outside the tree to the tree is kept, so memory is O(n) and each step is one
+    vectorised update. Points joining the tree are swapped to the end and dropped, so every
+    step only looks at the points still outside.
+    Edges compare by (squared distance, min(p, q), max(p, q)), the order part2 goes through them
+    in. That order has no ties, so there is a single minimum spanning tree, the one part2 builds,
+    and its longest edge is the last one part2 connects.
+    """
+    n_points = len(points)
+    # Points outside the tree are the first `outside` items of these arrays
+    point_idx = np.arange(n_points)
+    coordinates = np.ascontiguousarray(points.T)
+    best = ((coordinates - coordinates[:, :1]) ** 2).sum(axis=0)
+    closest = np.zeros(n_points, dtype=np.int64)
+
+    def drop(pos: int, last: int) -> None:
+        for array in (point_idx, best, closest):
+            array[pos], array[last] = array[last], array[pos]
+        coordinates[:, [pos, last]] = coordinates[:, [last, pos]]
+
+    drop(0, n_points - 1)
+    outside = n_points - 1
+
+    def pair_key(p: np.ndarray, q: np.ndarray) -> np.ndarray:
+        return np.minimum(p, q) * n_points + np.maximum(p, q)
+
+    last_edge = (-1, 0, 0)
+    while outside:
+        pos = int(np.argmin(best[:outside]))
+        nearest = np.flatnonzero(best[:outside] == best[pos])
+        if len(nearest) > 1:
+            pos = int(nearest[np.argmin(pair_key(point_idx[nearest], closest[nearest]))])
+        p, q = int(point_idx[pos]), int(closest[pos])
+        last_edge = max(last_edge, (int(best[pos]), min(p, q), max(p, q)))
+
+        outside -= 1
+        drop(pos, outside)
+        new_point = coordinates[:, outside:outside + 1]
+
+        distances = ((coordinates[:, :outside] - new_point) ** 2).sum(axis=0)
+        closer = distances < best[:outside]
+        tied = np.flatnonzero(distances == best[:outside])
+        if len(tied):
+            closer[tied] = pair_key(p, point_idx[tied]) < pair_key(closest[tied], point_idx[tied])
+        best[:outside][closer] = distances[closer]
+        closest[:outside][closer] = p
+
+    return last_edge
+
+
+@timer()
+def part2_prim(input_data: str) -> str:
+    points = parse_points(input_data)
+
+    _, p1, p2 = prim_last_edge(points)
+
+    result = int(points[p1, 0] * points[p2, 0])
+
+    return str(result)
+
+
+@timer()
+def part1_arrays(input_data: str) -> str:
+    points = parse_points(input_data)
+
+    circuits = DisjointSet(len(points))
+
+    for p1, p2, _ in shortest_edges(pair_edges(points), CONNECTIONS).tolist():
+        circuits.union(p1, p2)
+
+    result = reduce(lambda x, y: x * y, circuits.largest(3))
+
+    return str(result)
+
+@timer()
+def part2_arrays(input_data: str) -> str:
+    points = parse_points(input_data)
+
+    circuits = DisjointSet(len(points))
+
+    for chunk in sorted_edge_chunks(pair_edges(points)):
+        for p1, p2, _ in chunk.tolist():
+            if circuits.union(p1, p2):
+                last_connection_product_x = int(points[p1, 0] * points[p2, 0])
+                if circuits.components == 1:
+                    return str(last_connection_product_x)
+
+    return str(last_connection_product_x)
+
+
+@timer()
+def part1_online(input_data: str) -> str:
+    points = parse_points(input_data)
+
+    # Wiring every pair up to the weight of the CONNECTIONS-th shortest edge is what part1 does,
+    # as long as that weight is not tied with longer edges. With fewer edges than that, all of
+    # them get wired, so the longest one is the threshold
+    threshold = 0
+    for threshold, _, _ in islice(nearest_edges(points), CONNECTIONS):
+        pass
+    clusterer = CircuitClusterer(threshold)
+    for point in points.tolist():
+        clusterer.insert(tuple(point))
+
+    result = reduce(lambda x, y: x * y, clusterer.largest(3))
+
+    return str(result)
+
+
+@timer()
+def part1_knn(input_data: str) -> str:
+    points = parse_points(input_data)
+
+    circuits = DisjointSet(len(points))
+
+    for _, p1, p2 in islice(nearest_edges(points), CONNECTIONS):
+        circuits.union(p1, p2)
+
+    result = reduce(lambda x, y: x * y, circuits.largest(3))
+
+    return str(result)
+
+@timer()
+def part2_knn(input_data: str) -> str:
+    """Kruskal over nearest_edges. Fine on roughly uniform points, but every edge inside a dense
+    cluster comes out before the one leaving it, so clustered inputs should use part2_prim."""
+    points = parse_points(input_data)
+
+    circuits = DisjointSet(len(points))
+
+    for _, p1, p2 in nearest_edges(points):
+        if circuits.components == 1:
+            break
+        if circuits.union(p1, p2):
+            last_connection_product_x = int(points[p1, 0] * points[p2, 0])
+
+    result = str(last_connection_product_x)
+
+    return str(result)
 
 
 @timer()
@@ -82,32 +467,21 @@ def part1(input_data: str) -> str:
     points = [Point(l) for l in input_data.strip().split("\n")]
     edges = sorted([Edge(p1, p2) for p1, p2 in combinations(points, 2)], key=lambda e: e.weight)
 
-    circuits = [set([p]) for p in points]
+    point_idx = {p: idx for idx, p in enumerate(points)}
+    circuits = DisjointSet(len(points))
     forest = set()
 
-    for edge in edges[:1000]:
+    for edge in edges[:CONNECTIONS]:
         # console.print(f"Processing edge: {edge}")
-        if (idx1 := find_sets(edge.p1, circuits)) != (idx2 := find_sets(edge.p2, circuits)):
+        if circuits.union(point_idx[edge.p1], point_idx[edge.p2]):
             # console.print(f"Accepting edge {edge}")
             forest.add(edge)
-            new_circuit = circuits[idx1] | circuits[idx2]
-            if idx2 < idx1:
-                del circuits[idx1]
-                del circuits[idx2]
-            else:
-                del circuits[idx2]
-                del circuits[idx1]
-            circuits.append(new_circuit)
-            # console.print(f"New circuit {new_circuit}")
-            # console.print(f"Circuits now: {circuits}")
-    
-    sorted_circuits = sorted(circuits, key=lambda s: len(s), reverse=True)
-    
-    console.print(sorted_circuits[:3])
+
+    console.print(circuits.largest(3))
 
     # console.print(forest)
 
-    result = reduce(lambda x, y: x * y, [len(s) for s in sorted_circuits[:3]])
+    result = reduce(lambda x, y: x * y, circuits.largest(3))
     
     # result = "0"
     return str(result)
@@ -117,27 +491,18 @@ def part2(input_data: str) -> str:
     points = [Point(l) for l in input_data.strip().split("\n")]
     edges = sorted([Edge(p1, p2) for p1, p2 in combinations(points, 2)], key=lambda e: e.weight)
 
-    circuits = [set([p]) for p in points]
+    point_idx = {p: idx for idx, p in enumerate(points)}
+    circuits = DisjointSet(len(points))
     forest = set()
 
     for edge in edges:
-        if len(circuits) == 1:
+        if circuits.components == 1:
             break
         # console.print(f"Processing edge: {edge}")
-        if (idx1 := find_sets(edge.p1, circuits)) != (idx2 := find_sets(edge.p2, circuits)):
+        if circuits.union(point_idx[edge.p1], point_idx[edge.p2]):
             # console.print(f"Accepting edge {edge}")
             forest.add(edge)
-            new_circuit = circuits[idx1] | circuits[idx2]
-            if idx2 < idx1:
-                del circuits[idx1]
-                del circuits[idx2]
-            else:
-                del circuits[idx2]
-                del circuits[idx1]
-            circuits.append(new_circuit)
             last_connection_product_x = edge.p1.x * edge.p2.x
-            # console.print(f"New circuit {new_circuit}")
-            # console.print(f"Circuits now: {circuits}")
 
     # console.print(forest)
 
@@ -148,9 +513,18 @@ def part2(input_data: str) -> str:
 
 
 
-def main(submit: bool = False):
+ENGINES = {
+    "pairs": [part1, part2],
+    "knn": [part1_knn, part2_knn],
+    "arrays": [part1_arrays, part2_arrays],
+    "prim": [part1_knn, part2_prim],
+    "online": [part1_online, part2_prim],
+}
+
+
+def main(submit: bool = False, engine: str = "pairs"):
 
-    part_functions = [part1, part2]
+    part_functions = ENGINES[engine]
 
     for idx, part in enumerate(part_functions):
         day_input = get_puzzle_input(YEAR, DAY)
@@ -6,6 +6,7 @@ from itertools import combinations
 from math import log10
 from pathlib import Path
 
+import numpy as np
 import typer
 from elf import (
     get_puzzle_input,
@@ -85,6 +86,89 @@ def contains_not_border(r: Rectangle, p: "Point") -> bool:
     )
 
 
+def staircase(xs: np.ndarray, ys: np.ndarray) -> np.ndarray:
+    """Indexes of the points no other point beats in both smaller x and smaller y.
+
+    Flipping the sign of a coordinate gives the other three corners.
+    """
+    order = np.lexsort((ys, xs))
+    sorted_ys = ys[order]
+    lowest_before = np.minimum.accumulate(np.concatenate([[np.iinfo(np.int64).max], sorted_ys[:-1]]))
+
+    return order[sorted_ys < lowest_before]
+
+
+def largest_corner_pair(first: np.ndarray, second: np.ndarray) -> int:
+    """Largest rectangle with its bottom left corner in `first` and top right one in `second`.
+
+    Both are staircases sorted by x, so y goes down along them. Moving the bottom left corner to
+    the right never moves the best top right corner back to the left, so the best corner of the
+    middle row splits the columns for the rows above and below it. Every row of one level of that
+    split is scanned at once and each level reads every column about once: O(k log k) instead of
+    every pair.
+    Pairs that are not bottom left to top right score zero or less, so they never win.
+    """
+    first_x, first_y = first[:, 0], first[:, 1]
+    second_x, second_y = second[:, 0] + 1, second[:, 1] + 1
+
+    result = 0
+    # Rows low..high still to solve, with their best column somewhere in column_low..column_high
+    low, high = np.array([0]), np.array([len(first) - 1])
+    column_low, column_high = np.array([0]), np.array([len(second) - 1])
+    while len(low):
+        middle = (low + high) // 2
+        lengths = column_high - column_low + 1
+        starts = np.cumsum(lengths) - lengths
+
+        rows = np.repeat(middle, lengths)
+        columns = np.arange(lengths.sum()) - np.repeat(starts - column_low, lengths)
+        widths = second_x[columns] - first_x[rows]
+        heights = second_y[columns] - first_y[rows]
+        areas = np.where((widths < 0) & (heights < 0), -widths * heights, widths * heights)
+
+        row_best = np.maximum.reduceat(areas, starts)
+        result = max(result, int(row_best.max()))
+        is_best = np.flatnonzero(areas == np.repeat(row_best, lengths))
+        best = columns[is_best[np.searchsorted(is_best, starts)]]
+
+        above, below = low < middle, middle < high
+        low = np.concatenate([low[above], middle[below] + 1])
+        high = np.concatenate([middle[above] - 1, high[below]])
+        column_low = np.concatenate([column_low[above], best[below]])
+        column_high = np.concatenate([best[above], column_high[below]])
+
+    return result
+
+
+def largest_rectangle(points: np.ndarray) -> int:
+    """Largest rectangle with two red tiles as opposite corners.
+
+    Moving a corner further out never shrinks the rectangle, so the bottom left corner is on the
+    bottom left staircase of the tiles and the top right one on the top right staircase, and the
+    same goes for the other diagonal, which is the same problem with y flipped.
+    """
+    result = 0
+    for flip in (1, -1):
+        flipped = points * np.array([1, flip])
+        xs, ys = flipped[:, 0], flipped[:, 1]
+
+        first = flipped[staircase(xs, ys)]
+        second = flipped[staircase(-xs, -ys)][::-1]
+        result = max(result, largest_corner_pair(first, second))
+
+    return result
+
+
+@timer()
+def part1_staircase(input_data: str) -> str:
+    points = np.array(
+        [list(map(int, l.split(","))) for l in input_data.strip().split("\n")], dtype=np.int64
+    )
+
+    result = largest_rectangle(points)
+    return str(result)
+
+
 @timer()
 def part1(input_data: str) -> str:
     points = [Point(l) for l in input_data.strip().split("\n")]
@@ -122,8 +206,8 @@ def part2(input_data: str) -> str:
     return str(result)
 
 
-def main(submit: bool = False):
-    part_functions = [part1, part2]
+def main(submit: bool = False, hull: bool = False):
+    part_functions = [part1_staircase if hull else part1, part2]
 
     for idx, part in enumerate(part_functions):
         day_input = get_puzzle_input(YEAR, DAY)